@@ -44,6 +44,9 @@ class ChuniBot(commands.Bot):
     # Prefix cache
     prefixes: dict[int, str]
 
+    # Mention prefixes for the bot user, filled in once the user is known.
+    mention_prefixes: list[str]
+
     # key: user discord ID
     # value: userId, _t cookies from CHUNITHM-NET
     sessions: dict[int, tuple[str | None, str | None]]
@@ -51,6 +54,7 @@ class ChuniBot(commands.Bot):
     def __init__(self, *args, **kwargs):
         self.dev = config.dangerous.dev
         self.prefixes = {}
+        self.mention_prefixes = []
         self.sessions = {}
 
         super().__init__(*args, **kwargs)
@@ -60,6 +64,10 @@ class ChuniBot(commands.Bot):
         return await super().start(*args, **kwargs)
 
     async def setup_hook(self) -> None:
+        # setup_hook runs after login, so the bot user is available here.
+        if self.user is not None:
+            self.mention_prefixes = [f"<@{self.user.id}> ", f"<@!{self.user.id}> "]
+
         # Database setup
         connection_string = config.bot.db_connection_string
         self.engine = create_async_engine(connection_string)
@@ -71,31 +79,34 @@ class ChuniBot(commands.Bot):
                 "fuzz_qratio",
                 2,
                 functools.partial(fuzz.QRatio, processor=str.lower),  # type: ignore[reportCallIssue]
+                deterministic=True,
             )
 
         sqlalchemy.event.listen(self.engine.sync_engine, "connect", setup_database)
 
         # Load guild prefixes
         async with self.begin_db_session() as session:
-            prefixes = (await session.execute(select(Prefix))).scalars()
+            prefixes = await session.execute(select(Prefix.guild_id, Prefix.prefix))
 
-        self.prefixes = {prefix.guild_id: prefix.prefix for prefix in prefixes}
+        self.prefixes = dict(prefixes.all())
         logger.info(f"Loaded {len(self.prefixes)} guild prefixes")
 
         # Setup login web server (if enabled)
-        if config.web.enable:
+        web_config = config.web
+        if web_config.enable:
+            credentials = config.credentials
             self.app = init_app(
                 self,
-                goatcounter=config.web.goatcounter,
-                base_url=config.web.base_url,
-                kamaitachi_client_id=config.credentials.kamaitachi_client_id,
-                kamaitachi_client_secret=config.credentials.kamaitachi_client_secret,
+                goatcounter=web_config.goatcounter,
+                base_url=web_config.base_url,
+                kamaitachi_client_id=credentials.kamaitachi_client_id,
+                kamaitachi_client_secret=credentials.kamaitachi_client_secret,
             )
             _ = asyncio.ensure_future(  # noqa: RUF006
                 web._run_app(
                     self.app,
-                    port=config.web.port,
-                    host=config.web.listen_address,
+                    port=web_config.port,
+                    host=web_config.listen_address,
                 )
             )
 
@@ -110,7 +121,7 @@ class ChuniBot(commands.Bot):
             except commands.errors.ExtensionAlreadyLoaded:  # noqa: PERF203
                 logger.warning(f"{cog} already loaded")
             except commands.errors.NoEntryPointError:
-                logger.error(f"{COG_LIST} has no `setup` function.")
+                logger.error(f"{cog} has no `setup` function.")
             except commands.errors.ExtensionFailed as e:
                 logger.error(
                     f"{cog} raised an error: {e.original.__class__.__name__}: {e.original}"
@@ -129,7 +140,7 @@ class ChuniBot(commands.Bot):
 
 def guild_specific_prefix(default: str):
     async def inner(bot: ChuniBot, msg: discord.Message) -> list[str]:
-        when_mentioned = commands.when_mentioned(bot, msg)
+        when_mentioned = bot.mention_prefixes or commands.when_mentioned(bot, msg)
 
         if msg.guild is None:
             return [*when_mentioned, default]
@@ -1,4 +1,3 @@
-import dataclasses
 from http.cookiejar import CookieJar
 from typing import TYPE_CHECKING, Optional
 
@@ -84,7 +83,7 @@ class ChuniNet:
                 "token": self._token,
             }
         else:
-            params = dataclasses.asdict(recent_record.extras[_KEY_DETAILED_PARAMS])
+            params = recent_record.extras[_KEY_DETAILED_PARAMS]._asdict()
 
         soup = await self._request_soup(
             "POST",
@@ -1,104 +1,105 @@
+from bisect import bisect_right
 from enum import Enum, IntEnum
 
 
-class Difficulty(Enum):
-    BASIC = 0
-    ADVANCED = 1
-    EXPERT = 2
-    MASTER = 3
-    ULTIMA = 4
-    WORLDS_END = 5
+class _LabelledEnum(Enum):
+    """An `Enum` whose members are declared as `(value, label)`, where the
+    label is what `str()` and `format()` return."""
 
-    def __str__(self):
-        if self.value == 5:
-            return "WORLD'S END"
+    _value_: int
+    _label: str
 
-        return self.name
+    def __new__(cls, value: int, label: str):
+        obj = object.__new__(cls)
+        obj._value_ = value
+        obj._label = label
+        return obj
 
-    def color(self):
-        match self.value:
-            case 0:
-                return 0x009F7B
-            case 1:
-                return 0xF47900
-            case 2:
-                return 0xE92829
-            case 3:
-                return 0x8C1BE1
-            case 4:
-                return 0x131313
-            case 5:
-                return 0x0B6FF3
+    def __str__(self) -> str:
+        return self._label
 
-    def short_form(self):
-        if self.value == 5:
-            return "WE"
-        return self.name[:3]
+    def __format__(self, format_spec: str) -> str:
+        return format(self._label, format_spec)
 
-    def emoji(self):
-        match self.value:
-            case 0:
-                return ":green_square:"
-            case 1:
-                return ":yellow_square:"  # yellow square
-            case 2:
-                return ":red_square:"  # red square
-            case 3:
-                return ":purple_square:"  # purple square
-            case 4:
-                return ":black_large_square:"  # black large square
-            case 5:
-                return ":blue_square:"  # blue square
+
+class _LabelledIntEnum(IntEnum):
+    """An `IntEnum` whose members are declared as `(value, label)`, where the
+    label is what `str()` and `format()` return."""
+
+    _value_: int
+    _label: str
+
+    def __new__(cls, value: int, label: str):
+        obj = int.__new__(cls, value)
+        obj._value_ = value
+        obj._label = label
+        return obj
+
+    def __str__(self) -> str:
+        return self._label
+
+    def __format__(self, format_spec: str) -> str:
+        return format(self._label, format_spec)
+
+
+class Difficulty(_LabelledEnum):
+    _color: int
+    _short_form: str
+    _emoji: str
+
+    def __new__(cls, value: int, label: str, color: int, short_form: str, emoji: str):
+        obj = object.__new__(cls)
+        obj._value_ = value
+        obj._label = label
+        obj._color = color
+        obj._short_form = short_form
+        obj._emoji = emoji
+        return obj
+
+    BASIC = 0, "BASIC", 0x009F7B, "BAS", ":green_square:"
+    ADVANCED = 1, "ADVANCED", 0xF47900, "ADV", ":yellow_square:"
+    EXPERT = 2, "EXPERT", 0xE92829, "EXP", ":red_square:"
+    MASTER = 3, "MASTER", 0x8C1BE1, "MAS", ":purple_square:"
+    ULTIMA = 4, "ULTIMA", 0x131313, "ULT", ":black_large_square:"
+    WORLDS_END = 5, "WORLD'S END", 0x0B6FF3, "WE", ":blue_square:"
+
+    def color(self) -> int:
+        return self._color
+
+    def short_form(self) -> str:
+        return self._short_form
+
+    def emoji(self) -> str:
+        return self._emoji
 
     @classmethod
     def from_embed_color(cls, color: int):
-        if color == 0x009F7B:
-            return cls.BASIC
-        if color == 0xF47900:
-            return cls.ADVANCED
-        if color == 0xE92829:
-            return cls.EXPERT
-        if color == 0x8C1BE1:
-            return cls.MASTER
-        if color == 0x131313:
-            return cls.ULTIMA
-        if color == 0x0B6FF3:
-            return cls.WORLDS_END
-
-        msg = f"Unknown difficulty color: {color}"
-        raise ValueError(msg)
+        if (difficulty := _EMBED_COLOR_TO_DIFFICULTY.get(color)) is None:
+            msg = f"Unknown difficulty color: {color}"
+            raise ValueError(msg)
+
+        return difficulty
 
     @classmethod
     def from_short_form(cls, short_form: str):
-        if short_form == "BAS":
-            return cls.BASIC
-        if short_form == "ADV":
-            return cls.ADVANCED
-        if short_form == "EXP":
-            return cls.EXPERT
-        if short_form == "MAS":
-            return cls.MASTER
-        if short_form == "ULT":
-            return cls.ULTIMA
-        if short_form == "WE":
-            return cls.WORLDS_END
-
-        msg = f"Unknown difficulty short form: {short_form}"
-        raise ValueError(msg)
+        if (difficulty := _SHORT_FORM_TO_DIFFICULTY.get(short_form)) is None:
+            msg = f"Unknown difficulty short form: {short_form}"
+            raise ValueError(msg)
 
+        return difficulty
 
-class ClearType(Enum):
-    FAILED = 0
-    CLEAR = 1
-    HARD = 4
-    ABSOLUTE = 5
-    ABSOLUTE_PLUS = 6
-    CATASTROPHY = 7
 
-    def __str__(self):
-        if self.value == 6:
-            return "ABSOLUTE+"
-        return self.name.replace("_", " ")
+_EMBED_COLOR_TO_DIFFICULTY = {d.color(): d for d in Difficulty}
+_SHORT_FORM_TO_DIFFICULTY = {d.short_form(): d for d in Difficulty}
+
+
+class ClearType(_LabelledEnum):
+    FAILED = 0, "FAILED"
+    CLEAR = 1, "CLEAR"
+    HARD = 4, "HARD"
+    ABSOLUTE = 5, "ABSOLUTE"
+    ABSOLUTE_PLUS = 6, "ABSOLUTE+"
+    CATASTROPHY = 7, "CATASTROPHY"
 
     def short_form(self):
         if self.value == 0:
@@ -113,21 +114,16 @@ class ClearType(Enum):
             return "ABS+"
         if self.value == 7:
             return "CTS"
-        
+
         msg = f"Unknown clear type value {self.value}"
         raise ValueError(msg)
 
 
-class ComboType(Enum):
-    NONE = 0
-    FULL_COMBO = 1
-    ALL_JUSTICE = 2
-    ALL_JUSTICE_CRITICAL = 3
-
-    def __str__(self):
-        if self.value == 3:
-            return "AJC"
-        return self.name.replace("_", " ")
+class ComboType(_LabelledEnum):
+    NONE = 0, "NONE"
+    FULL_COMBO = 1, "FULL COMBO"
+    ALL_JUSTICE = 2, "ALL JUSTICE"
+    ALL_JUSTICE_CRITICAL = 3, "AJC"
 
     def short_form(self):
         if self.value == 0:
@@ -143,15 +139,10 @@ class ComboType(Enum):
         raise ValueError(msg)
 
 
-class ChainType(IntEnum):
-    NONE = 0
-    FULL_CHAIN = 1
-    FULL_CHAIN_PLUS = 2
-
-    def __str__(self):
-        if self.value == 2:
-            return "FULL CHAIN+"
-        return self.name.replace("_", " ")
+class ChainType(_LabelledIntEnum):
+    NONE = 0, "NONE"
+    FULL_CHAIN = 1, "FULL CHAIN"
+    FULL_CHAIN_PLUS = 2, "FULL CHAIN+"
 
     def short_form(self):
         if self.value == 0:
@@ -165,54 +156,25 @@ class ChainType(IntEnum):
         raise ValueError(msg)
 
 
-class Rank(Enum):
-    D = 0
-    C = 1
-    B = 2
-    BB = 3
-    BBB = 4
-    A = 5
-    AA = 6
-    AAA = 7
-    S = 8
-    Sp = 9
-    SS = 10
-    SSp = 11
-    SSS = 12
-    SSSp = 13
-
-    def __str__(self) -> str:
-        return self.name.replace("p", "+")
+class Rank(_LabelledEnum):
+    D = 0, "D"
+    C = 1, "C"
+    B = 2, "B"
+    BB = 3, "BB"
+    BBB = 4, "BBB"
+    A = 5, "A"
+    AA = 6, "AA"
+    AAA = 7, "AAA"
+    S = 8, "S"
+    Sp = 9, "S+"
+    SS = 10, "SS"
+    SSp = 11, "SS+"
+    SSS = 12, "SSS"
+    SSSp = 13, "SSS+"
 
     @classmethod
     def from_score(cls, score: int):
-        if score >= 1009000:
-            return cls.SSSp
-        if score >= 1007500:
-            return cls.SSS
-        if score >= 1005000:
-            return cls.SSp
-        if score >= 1000000:
-            return cls.SS
-        if score >= 990000:
-            return cls.Sp
-        if score >= 975000:
-            return cls.S
-        if score >= 950000:
-            return cls.AAA
-        if score >= 925000:
-            return cls.AA
-        if score >= 900000:
-            return cls.A
-        if score >= 800000:
-            return cls.BBB
-        if score >= 700000:
-            return cls.BB
-        if score >= 600000:
-            return cls.B
-        if score >= 500000:
-            return cls.C
-        return cls.D
+        return _RANKS[bisect_right(_RANK_THRESHOLDS, score)]
 
     @property
     def min_score(self) -> int:
@@ -247,96 +209,68 @@ class Rank(Enum):
                 return 1009000
 
 
-class Possession(Enum):
-    NONE = 0
-    SILVER = 1
-    GOLD = 2
-    PLATINUM = 3
-    RAINBOW = 4
-
-    @classmethod
-    def from_str(cls, s: str):
-        if s == "silver":
-            return cls.SILVER
-        if s == "gold":
-            return cls.GOLD
-        if s == "platina" or s == "platinum":
-            return cls.PLATINUM
-        if s == "rainbow":
-            return cls.RAINBOW
-
-        return cls.NONE
-
-    def color(self):
-        match self.value:
-            case 0:
-                return 0xCECECE
-            case 1:
-                return 0x6BAAC7
-            case 2:
-                return 0xFCE620
-            case 3:
-                return 0xFFF6C5
-            case 4:
-                return 0x0B6FF3
-
-
-class SkillClass(Enum):
-    I = 1  # noqa: E741
-    II = 2
-    III = 3
-    IV = 4
-    V = 5
-    INFINITE = 6
-
-    def __str__(self):
-        if self.value == 6:
-            return "∞"
-        return self.name
-
+_RANKS = tuple(Rank)
+_RANK_THRESHOLDS = tuple(rank.min_score for rank in _RANKS[1:])
 
-class CourseClass(IntEnum):
-    I = 1  # noqa: E741
-    II = 2
-    III = 3
-    IV = 4
-    V = 5
-    INFINITE = 6
-    EXTRA = 7
-
-    def __str__(self):
-        if self.value == 6:
-            return "∞"
-        return self.name
 
+class Possession(Enum):
+    _value_: int
+    _color: int
 
-class Genres(Enum):
-    ALL = 99
-    POPS_AND_ANIME = 0
-    NICONICO = 2
-    TOUHOU_PROJECT = 3
-    ORIGINAL = 5
-    VARIETY = 6
-    IRODORIMIDORI = 7
-    GEKIMAI = 9
+    def __new__(cls, value: int, color: int):
+        obj = object.__new__(cls)
+        obj._value_ = value
+        obj._color = color
+        return obj
 
-    def __str__(self) -> str:
-        if self.value == 99:
-            return "All genres"
-        if self.value == 0:
-            return "POPS & ANIME"
-        if self.value == 2:
-            return "niconico"
-        if self.value == 3:
-            return "東方Project"
-        if self.value == 5:
-            return "ORIGINAL"
-        if self.value == 6:
-            return "VARIETY"
-        if self.value == 7:
-            return "イロドリミドリ"
-        if self.value == 9:
-            return "ゲキマイ"
+    NONE = 0, 0xCECECE
+    SILVER = 1, 0x6BAAC7
+    GOLD = 2, 0xFCE620
+    PLATINUM = 3, 0xFFF6C5
+    RAINBOW = 4, 0x0B6FF3
 
-        msg = f"Unknown genre ID: {self.value}"
-        raise ValueError(msg)
+    @classmethod
+    def from_str(cls, s: str):
+        return _STR_TO_POSSESSION.get(s, cls.NONE)
+
+    def color(self) -> int:
+        return self._color
+
+
+_STR_TO_POSSESSION = {
+    "silver": Possession.SILVER,
+    "gold": Possession.GOLD,
+    "platina": Possession.PLATINUM,
+    "platinum": Possession.PLATINUM,
+    "rainbow": Possession.RAINBOW,
+}
+
+
+class SkillClass(_LabelledEnum):
+    I = 1, "I"  # noqa: E741
+    II = 2, "II"
+    III = 3, "III"
+    IV = 4, "IV"
+    V = 5, "V"
+    INFINITE = 6, "∞"
+
+
+class CourseClass(_LabelledIntEnum):
+    I = 1, "I"  # noqa: E741
+    II = 2, "II"
+    III = 3, "III"
+    IV = 4, "IV"
+    V = 5, "V"
+    INFINITE = 6, "∞"
+    EXTRA = 7, "EXTRA"
+
+
+class Genres(_LabelledEnum):
+    ALL = 99, "All genres"
+    POPS_AND_ANIME = 0, "POPS & ANIME"
+    NICONICO = 2, "niconico"
+    TOUHOU_PROJECT = 3, "東方Project"
+    ORIGINAL = 5, "ORIGINAL"
+    VARIETY = 6, "VARIETY"
+    IRODORIMIDORI = 7, "イロドリミドリ"
+    GEKIMAI = 9, "ゲキマイ"
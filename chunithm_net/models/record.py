@@ -1,27 +1,24 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import Optional
+from typing import NamedTuple, Optional
 
 from .enums import ChainType, ClearType, ComboType, CourseClass, Difficulty, Rank
 from .type_paired_dict import TypePairedDict
 
 
-@dataclass
-class Skill:
+class Skill(NamedTuple):
     name: str
     grade: Optional[int]
 
 
-@dataclass
-class Judgements:
+class Judgements(NamedTuple):
     jcrit: int
     justice: int
     attack: int
     miss: int
 
 
-@dataclass
-class NoteType:
+class NoteType(NamedTuple):
     tap: float
     hold: float
     slide: float
@@ -29,13 +26,12 @@ class NoteType:
     flick: float
 
 
-@dataclass
-class DetailedParams:
+class DetailedParams(NamedTuple):
     idx: int
     token: str
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Record:
     title: str
     difficulty: Difficulty
@@ -51,24 +47,32 @@ class Record:
     extras: TypePairedDict = field(default_factory=TypePairedDict)
 
 
-@dataclass(kw_only=True)
+# Slotted dataclasses have no __dict__, and dataclasses.asdict would deep-copy
+# the extras dict, so promotions copy these fields by name instead.
+_RECORD_FIELDS = tuple(f.name for f in fields(Record))
+
+
+@dataclass(kw_only=True, slots=True)
 class MusicRecord(Record):
     play_count: Optional[int] = None
     ajc_count: Optional[int] = None
 
     @staticmethod
     def from_record(record: Record) -> "MusicRecord":
-        return MusicRecord(**record.__dict__, jacket="")
+        return MusicRecord(**{name: getattr(record, name) for name in _RECORD_FIELDS})
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class RecentRecord(MusicRecord):
     track: int
     date: datetime
     new_record: bool
 
 
-@dataclass(kw_only=True)
+_RECENT_RECORD_FIELDS = tuple(f.name for f in fields(RecentRecord))
+
+
+@dataclass(kw_only=True, slots=True)
 class DetailedRecentRecord(RecentRecord):
     character: str
     skill: Skill
@@ -82,7 +86,7 @@ class DetailedRecentRecord(RecentRecord):
     @staticmethod
     def from_basic(record: RecentRecord) -> "DetailedRecentRecord":
         return DetailedRecentRecord(
-            **record.__dict__,
+            **{name: getattr(record, name) for name in _RECENT_RECORD_FIELDS},
             character="",
             skill=Skill("", 0),
             skill_result=0,
@@ -92,7 +96,7 @@ class DetailedRecentRecord(RecentRecord):
         )
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class CourseRecord:
     id: int
     cls: CourseClass
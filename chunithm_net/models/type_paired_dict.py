@@ -1,4 +1,4 @@
-from typing import Generic, TypeVar, overload
+from typing import TYPE_CHECKING, Generic, TypeVar, overload
 
 KT = TypeVar("KT")
 T = TypeVar("T")
@@ -8,37 +8,41 @@ class TypePairedDictKey(Generic[KT]):
     pass
 
 
-class TypePairedDict(dict):
-    """
-    A `dict` subclass that types values based on their keys. The intended usage is
-    something like this:
+if TYPE_CHECKING:
 
-    ```python
-    # Keep the key as a constant, and optionally export it so consumers can also
-    # get the stored value.
-    KEY_SOMETHING = TypePairedDictKey[int]()
+    class TypePairedDict(dict):
+        """
+        A `dict` that types values based on their keys. The intended usage is
+        something like this:
 
-    data = TypePairedDict()
-    reveal_type(data[KEY_SOMETHING])  # should be int
-    ```
-    """
+        ```python
+        # Keep the key as a constant, and optionally export it so consumers can also
+        # get the stored value.
+        KEY_SOMETHING = TypePairedDictKey[int]()
 
-    def __getitem__(self, key: TypePairedDictKey[KT]) -> KT:
-        return super().__getitem__(key)
+        data = TypePairedDict()
+        reveal_type(data[KEY_SOMETHING])  # should be int
+        ```
 
-    def __setitem__(self, key: TypePairedDictKey[KT], value: KT) -> None:
-        return super().__setitem__(key, value)
+        This class only exists for type checkers. At runtime `TypePairedDict` is
+        plain `dict`, so lookups do not go through Python-level overrides.
+        """
 
-    @overload
-    def get(self, key: TypePairedDictKey[KT]) -> KT | None: ...
+        def __getitem__(self, key: TypePairedDictKey[KT]) -> KT: ...
 
-    @overload
-    def get(self, key: TypePairedDictKey[KT], default: KT) -> KT: ...
+        def __setitem__(self, key: TypePairedDictKey[KT], value: KT) -> None: ...
 
-    @overload
-    def get(self, key: TypePairedDictKey[KT], default: T) -> T | KT: ...
+        @overload
+        def get(self, key: TypePairedDictKey[KT]) -> KT | None: ...
 
-    def get(
-        self, key: TypePairedDictKey[KT], default: T | KT | None = None
-    ) -> T | KT | None:
-        return super().get(key)
+        @overload
+        def get(self, key: TypePairedDictKey[KT], default: KT) -> KT: ...
+
+        @overload
+        def get(self, key: TypePairedDictKey[KT], default: T) -> T | KT: ...
+
+        def get(
+            self, key: TypePairedDictKey[KT], default: T | KT | None = None
+        ) -> T | KT | None: ...
+else:
+    TypePairedDict = dict
@@ -1,11 +1,17 @@
+import functools
+import re
 from datetime import datetime
-from typing import cast
+from typing import TypeVar, cast
 
 from bs4.element import ResultSet, Tag
 from zoneinfo import ZoneInfo
 
 from .models.enums import ChainType, ClearType, ComboType, Difficulty, Rank
 
+T = TypeVar("T")
+
+_TOKYO_TZ = ZoneInfo("Asia/Tokyo")
+
 
 def chuni_int(s: str) -> int:
     return int(s.replace(",", ""))
@@ -22,95 +28,101 @@ def parse_player_rating(soup: ResultSet[Tag]) -> float:
     return float(rating)
 
 
+@functools.lru_cache(maxsize=256)
 def parse_time(time: str, format: str = "%Y/%m/%d %H:%M") -> datetime:
-    return datetime.strptime(time, format).replace(tzinfo=ZoneInfo("Asia/Tokyo"))
+    return datetime.strptime(time, format).replace(tzinfo=_TOKYO_TZ)
 
 
+@functools.lru_cache(maxsize=1024)
 def extract_last_part(url: str) -> str:
     return url.split("_")[-1].split(".")[0]
 
 
+_IMGURL_SUFFIX_TO_DIFFICULTY = {
+    "basic": Difficulty.BASIC,
+    "advanced": Difficulty.ADVANCED,
+    "expert": Difficulty.EXPERT,
+    "master": Difficulty.MASTER,
+    "worldsend": Difficulty.WORLDS_END,
+    "ultima": Difficulty.ULTIMA,
+    "ultimate": Difficulty.ULTIMA,
+}
+
+
+@functools.lru_cache(maxsize=1024)
 def difficulty_from_imgurl(url: str) -> Difficulty:
-    match extract_last_part(url):
-        case "basic":
-            return Difficulty.BASIC
-        case "advanced":
-            return Difficulty.ADVANCED
-        case "expert":
-            return Difficulty.EXPERT
-        case "master":
-            return Difficulty.MASTER
-        case "worldsend":
-            return Difficulty.WORLDS_END
-        case "ultima":
-            return Difficulty.ULTIMA
-        case "ultimate":
-            return Difficulty.ULTIMA
-
-        case _:
-            msg = f"Unknown difficulty: {url}"
-            raise ValueError(msg)
+    if (difficulty := _IMGURL_SUFFIX_TO_DIFFICULTY.get(extract_last_part(url))) is None:
+        msg = f"Unknown difficulty: {url}"
+        raise ValueError(msg)
+
+    return difficulty
+
+
+# Alternatives sharing a prefix are ordered longest-first so that e.g.
+# "absolutep" is not matched as "absolute".
+_ICON_RE = re.compile(
+    r"_rank_(\d+)|(course_clear|clear|hard|absolutep|absolute|catastrophy"
+    r"|fullchain2|fullchain|fullcombo|alljusticecritical|alljustice)"
+)
+
+_CLEAR_TYPE_ICONS = (
+    ("course_clear", ClearType.CLEAR),
+    ("clear", ClearType.CLEAR),
+    ("hard", ClearType.HARD),
+    ("absolutep", ClearType.ABSOLUTE_PLUS),
+    ("absolute", ClearType.ABSOLUTE),
+    ("catastrophy", ClearType.CATASTROPHY),
+)
+_CHAIN_TYPE_ICONS = (
+    ("fullchain2", ChainType.FULL_CHAIN),
+    ("fullchain", ChainType.FULL_CHAIN_PLUS),
+)
+# FC and AJ should override all other lamps.
+_COMBO_TYPE_ICONS = (
+    ("fullcombo", ComboType.FULL_COMBO),
+    ("alljusticecritical", ComboType.ALL_JUSTICE_CRITICAL),
+    ("alljustice", ComboType.ALL_JUSTICE),
+)
+
+
+def _scan_icons(soup: Tag) -> tuple[Rank, set[str]]:
+    rank = None
+    icons = set()
+
+    for img in soup.find_all("img"):
+        if (match := _ICON_RE.search(cast(str, img.get("src", "")))) is None:
+            continue
+
+        if match[2] is not None:
+            icons.add(match[2])
+        elif rank is None:
+            rank = Rank(int(match[1]))
+
+    return rank or Rank.D, icons
+
+
+def _pick_lamp(icons: set[str], candidates: tuple[tuple[str, T], ...], default: T) -> T:
+    for icon, lamp in candidates:
+        if icon in icons:
+            return lamp
+
+    return default
 
 
 def get_rank_and_lamps(soup: Tag) -> tuple[Rank, ClearType, ComboType, ChainType]:
-    if (rank_img_elem := soup.select_one("img[src*=_rank_]")) is not None:
-        rank_img_url = cast(str, rank_img_elem["src"])
-        rank = Rank(int(extract_last_part(rank_img_url)))
-    else:
-        rank = Rank.D
-
-    if soup.select_one("img[src*=clear]") is not None:
-        clear_type = ClearType.CLEAR
-    elif soup.select_one("img[src*=hard]") is not None:
-        clear_type = ClearType.HARD
-    elif soup.select_one("img[src*=absolutep]") is not None:
-        clear_type = ClearType.ABSOLUTE_PLUS
-    elif soup.select_one("img[src*=absolute]") is not None:
-        clear_type = ClearType.ABSOLUTE
-    elif soup.select_one("img[src*=catastrophy]") is not None:
-        clear_type = ClearType.CATASTROPHY
-    else:
-        clear_type = ClearType.FAILED
-
-    if soup.select_one("img[src*=fullchain2]") is not None:
-        chain_type = ChainType.FULL_CHAIN
-    elif soup.select_one("img[src*=fullchain]") is not None:
-        chain_type = ChainType.FULL_CHAIN_PLUS
-    else:
-        chain_type = ChainType.NONE
-
-    # FC and AJ should override all other lamps.
-    if soup.select_one("img[src*=fullcombo]") is not None:
-        combo_type = ComboType.FULL_COMBO
-    elif soup.select_one("img[src*=alljusticecritical]") is not None:
-        combo_type = ComboType.ALL_JUSTICE_CRITICAL
-    elif soup.select_one("img[src*=alljustice]") is not None:
-        combo_type = ComboType.ALL_JUSTICE
-    else:
-        combo_type = ComboType.NONE
+    rank, icons = _scan_icons(soup)
+
+    clear_type = _pick_lamp(icons, _CLEAR_TYPE_ICONS, ClearType.FAILED)
+    chain_type = _pick_lamp(icons, _CHAIN_TYPE_ICONS, ChainType.NONE)
+    combo_type = _pick_lamp(icons, _COMBO_TYPE_ICONS, ComboType.NONE)
 
     return rank, clear_type, combo_type, chain_type
 
 
 def get_course_rank_and_lamps(soup: Tag):
-    if (rank_img_elem := soup.select_one("img[src*=_rank_]")) is not None:
-        rank_img_url = cast(str, rank_img_elem["src"])
-        rank = Rank(int(extract_last_part(rank_img_url)))
-    else:
-        rank = Rank.D
-
-    if soup.select_one("img[src*=course_clear]") is not None:
-        clear_type = ClearType.CLEAR
-    else:
-        clear_type = ClearType.FAILED
-
-    if soup.select_one("img[src*=fullcombo]") is not None:
-        combo_type = ComboType.FULL_COMBO
-    elif soup.select_one("img[src*=alljusticecritical]") is not None:
-        combo_type = ComboType.ALL_JUSTICE_CRITICAL
-    elif soup.select_one("img[src*=alljustice]") is not None:
-        combo_type = ComboType.ALL_JUSTICE
-    else:
-        combo_type = ComboType.NONE
+    rank, icons = _scan_icons(soup)
+
+    clear_type = ClearType.CLEAR if "course_clear" in icons else ClearType.FAILED
+    combo_type = _pick_lamp(icons, _COMBO_TYPE_ICONS, ComboType.NONE)
 
     return rank, clear_type, combo_type
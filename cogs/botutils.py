@@ -1,10 +1,12 @@
 import contextlib
 import io
+import re
 import sys
 from dataclasses import dataclass
 from http.cookiejar import LWPCookieJar
 from typing import TYPE_CHECKING, Optional, Sequence, TypeVar
 
+import discord
 import httpx
 from discord.ext import commands
 from discord.ext.commands import Context
@@ -25,7 +27,7 @@ from chunithm_net.consts import (
 )
 from chunithm_net.models.enums import Rank
 from chunithm_net.models.record import Record
-from database.models import Alias, Cookie, Song
+from database.models import Alias, Chart, Cookie, Song
 from utils import get_jacket_url
 from utils.calculation.overpower import (
     calculate_overpower_base,
@@ -64,6 +66,9 @@ class CachedAlias:
         self.guild_id = guild_id
 
 
+_USER_ID_OR_MENTION = re.compile(r"<@!?([0-9]{15,20})>|([0-9]{15,20})")
+
+
 @dataclass
 class SongSearchResult:
     songs: list[Song]
@@ -76,9 +81,24 @@ class UtilsCog(commands.Cog, name="Utils"):
         self.bot = bot
         self.alias_cache: list[CachedAlias] = []
 
+        # Shared by every command that reads from Kamaitachi, so consecutive
+        # commands reuse open connections. Authentication is per user, so pass
+        # the headers from `kamaitachi_auth` with each request.
+        self.kamaitachi_http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0),
+            follow_redirects=True,
+            transport=httpx.AsyncHTTPTransport(retries=5),
+            headers={
+                "User-Agent": f"chuni-penguin (+https://github.com/beer-psi/chuni-penguin) Python/{sys.version_info[0]}.{sys.version_info[1]} httpx/{httpx.__version__}"
+            },
+        )
+
     async def cog_load(self) -> None:
         return await self._reload_alias_cache()
 
+    async def cog_unload(self) -> None:
+        await self.kamaitachi_http_client.aclose()
+
     async def _reload_alias_cache(self) -> None:
         async with self.bot.begin_db_session() as session:
             stmt = select(Song).options(joinedload(Song.aliases))
@@ -116,6 +136,25 @@ class UtilsCog(commands.Cog, name="Utils"):
 
         return self.bot.prefixes.get(ctx.guild.id, default_prefix)
 
+    async def resolve_user(
+        self, ctx: Context, argument: str
+    ) -> Optional[discord.User | discord.Member]:
+        # mentions and raw IDs can be resolved from the cache directly
+        if (match := _USER_ID_OR_MENTION.fullmatch(argument)) is not None:
+            user_id = int(match[1] or match[2])
+            user = (
+                ctx.guild.get_member(user_id) if ctx.guild is not None else None
+            ) or ctx.bot.get_user(user_id)
+
+            if user is not None:
+                return user
+
+        for converter in [commands.MemberConverter, commands.UserConverter]:
+            with contextlib.suppress(commands.BadArgument):
+                return await converter().convert(ctx, argument)
+
+        return None
+
     async def login_check(self, ctx_or_id: Context | int) -> LWPCookieJar:
         id = ctx_or_id if isinstance(ctx_or_id, int) else ctx_or_id.author.id
         clal = await self.fetch_cookie(id)
@@ -158,8 +197,7 @@ class UtilsCog(commands.Cog, name="Utils"):
 
             await session.close()
 
-    @contextlib.asynccontextmanager
-    async def kamaitachi_client(self, ctx_or_id: Context | int):
+    async def kamaitachi_auth(self, ctx_or_id: Context | int) -> dict[str, str]:
         id = ctx_or_id if isinstance(ctx_or_id, int) else ctx_or_id.author.id
 
         async with self.bot.begin_db_session() as session:
@@ -169,18 +207,7 @@ class UtilsCog(commands.Cog, name="Utils"):
                 msg = "You have not linked your Kamaitachi account. Please send `c>kamaitachi link` in my DMs to get started."
                 raise commands.CommandError(msg)
 
-        client = httpx.AsyncClient(
-            timeout=httpx.Timeout(60.0),
-            follow_redirects=True,
-            transport=httpx.AsyncHTTPTransport(retries=5),
-        )
-        client.headers["Authorization"] = f"Bearer {cookie.kamaitachi_token}"
-        client.headers["User-Agent"] = (
-            f"chuni-penguin (+https://github.com/beer-psi/chuni-penguin) Python/{sys.version_info[0]}.{sys.version_info[1]} httpx/{httpx.__version__}"
-        )
-
-        async with client:
-            yield client
+        return {"Authorization": f"Bearer {cookie.kamaitachi_token}"}
 
     async def hydrate_records(self, records: Sequence[T]) -> list[T]:
         song_ids = set()
@@ -205,11 +232,15 @@ class UtilsCog(commands.Cog, name="Utils"):
             songs = (await session.execute(stmt)).scalars().unique()
 
         song_lookup: dict[int | str, Song] = {}
+        chart_lookup: dict[tuple[int, str], Chart] = {}
 
         for song in songs:
             song_lookup[song.id] = song
             song_lookup[song.jacket] = song
 
+            for chart in song.charts:
+                chart_lookup[song.id, chart.difficulty] = chart
+
         hydrated_records = []
 
         for record in records[:]:
@@ -236,14 +267,7 @@ class UtilsCog(commands.Cog, name="Utils"):
             if record.jacket is None:
                 record.jacket = get_jacket_url(song)
 
-            chart = next(
-                (
-                    c
-                    for c in song.charts
-                    if c.difficulty == record.difficulty.short_form()
-                ),
-                None,
-            )
+            chart = chart_lookup.get((song.id, record.difficulty.short_form()))
 
             if chart is None:
                 logger.warning(
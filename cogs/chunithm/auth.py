@@ -1,3 +1,4 @@
+import asyncio
 from asyncio import TimeoutError
 from http.cookiejar import Cookie as HTTPCookie
 from http.cookiejar import LWPCookieJar
@@ -61,6 +62,7 @@ class AuthCog(commands.Cog, name="Auth"):
             stmt = delete(Cookie).where(Cookie.discord_id == ctx.author.id)
             await session.execute(stmt)
             await session.commit()
+        self.bot.dispatch("profile_update", ctx.author.id)
         await ctx.reply(msg, mention_author=False)
 
     async def _verify_and_login(self, id: int, clal: str) -> Optional[Exception]:
@@ -98,7 +100,9 @@ class AuthCog(commands.Cog, name="Auth"):
             await session.merge(
                 Cookie(discord_id=id, cookie=f"#LWP-Cookies-2.0\n{jar.as_lwp_str()}")
             )
-            return None
+
+        self.bot.dispatch("profile_update", id)
+        return None
 
     @commands.hybrid_command("login")
     async def login(self, ctx: Context, clal: Optional[str] = None):
@@ -139,15 +143,14 @@ class AuthCog(commands.Cog, name="Auth"):
 
             logger.debug("Sending login instructions to user %d", ctx.author.id)
 
-            channel = (
-                ctx.author.dm_channel
-                if ctx.author.dm_channel
-                else await ctx.author.create_dm()
-            )
-
-            await ctx.send(
-                f"Login instructions have been sent to your DMs. {please_delete_message}"
-                "(please **enable Privacy Settings -> Direct Messages** if you haven't received it.)"
+            # create_dm() returns the cached DM channel if there is one, and
+            # opening a new one does not need to wait for the reply.
+            channel, _ = await asyncio.gather(
+                ctx.author.create_dm(),
+                ctx.send(
+                    f"Login instructions have been sent to your DMs. {please_delete_message}"
+                    "(please **enable Privacy Settings -> Direct Messages** if you haven't received it.)"
+                ),
             )
         elif clal is not None:
             if await self._verify_and_login(ctx.author.id, clal) is None:
@@ -1,4 +1,6 @@
 import binascii
+import functools
+import re
 import string
 from enum import IntEnum, IntFlag, auto
 from typing import TYPE_CHECKING, NotRequired, TypedDict, overload
@@ -10,10 +12,11 @@ from discord.ext.commands import Context
 
 from chunithm_net.consts import KEY_SONG_ID
 from chunithm_net.models.enums import ChainType, ClearType, ComboType, Difficulty
+from chunithm_net.models.record import Record
+from utils.progress import ProgressMessage
 
 if TYPE_CHECKING:
     from bot import ChuniBot
-    from chunithm_net.models.record import Record
     from cogs.botutils import UtilsCog
 
 
@@ -54,7 +57,31 @@ class ChunirecCourseLamp(IntFlag):
     ALL_JUSTICE_CRITICAL = auto()
 
 
+# raw lamp bits, so the per-record loop does plain int ORs instead of IntFlag ones
+_COMBO_LAMPS: dict[ComboType, int] = {
+    ComboType.ALL_JUSTICE_CRITICAL: ChunirecComboLamp.ALL_JUSTICE_CRITICAL.value,
+    ComboType.ALL_JUSTICE: ChunirecComboLamp.ALL_JUSTICE.value,
+    ComboType.FULL_COMBO: ChunirecComboLamp.FULL_COMBO.value,
+}
+_CHAIN_LAMPS: dict[ChainType, int] = {
+    ChainType.FULL_CHAIN_PLUS: ChunirecComboLamp.FULL_CHAIN_PLUS.value,
+    ChainType.FULL_CHAIN: ChunirecComboLamp.FULL_CHAIN.value,
+}
+_CLEAR_LAMPS: dict[ClearType, int] = {
+    ClearType.CLEAR: ChunirecClearLamp.CLEAR.value,
+    ClearType.HARD: ChunirecClearLamp.HARD.value,
+    ClearType.ABSOLUTE: ChunirecClearLamp.ABSOLUTE.value,
+    ClearType.ABSOLUTE_PLUS: ChunirecClearLamp.ABSOLUTE_PLUS.value,
+    ClearType.CATASTROPHY: ChunirecClearLamp.CATASTROPHY.value,
+}
+
 BASE62_ALPHABET = string.digits + string.ascii_uppercase + string.ascii_lowercase
+_BASE62_CHARS = frozenset(BASE62_ALPHABET)
+# alternating runs of base62 and non-base62 characters
+_BASE62_RUNS = re.compile(r"[0-9A-Za-z]+|[^0-9A-Za-z]+")
+_BASE62_PAIRS = tuple(a + b for a in BASE62_ALPHABET for b in BASE62_ALPHABET)
+# largest value representable in n base62 digits, indexed by n
+_BASE62_MAX = tuple(62**length - 1 for length in range(8))
 TITLE_RARITIES = [
     "x",
     "normal",
@@ -96,10 +123,10 @@ def to_base_n(number: int, base: int, alphabet: str | None = None):
     digits: list[int] = []
 
     while number:
-        digits.append(number % base)
-        number //= base
+        number, digit = divmod(number, base)
+        digits.append(digit)
 
-    digits = digits[::-1]
+    digits.reverse()
 
     if alphabet:
         return "".join([alphabet[x] for x in digits])
@@ -107,6 +134,23 @@ def to_base_n(number: int, base: int, alphabet: str | None = None):
     return digits
 
 
+def _to_base62(number: int) -> str:
+    if number < 62:
+        return BASE62_ALPHABET[number]
+
+    # emit two digits per divmod using the precomputed pair table
+    pairs: list[str] = []
+
+    while number >= 3844:
+        number, rest = divmod(number, 3844)
+        pairs.append(_BASE62_PAIRS[rest])
+
+    pairs.append(_BASE62_PAIRS[number] if number >= 62 else BASE62_ALPHABET[number])
+    pairs.reverse()
+
+    return "".join(pairs)
+
+
 def clamp(value: int, min: int, max: int):
     if value < min:
         return min
@@ -116,6 +160,7 @@ def clamp(value: int, min: int, max: int):
     return value
 
 
+@functools.lru_cache(maxsize=8192)
 def serialize_number(
     value: int,
     length: int,
@@ -127,40 +172,39 @@ def serialize_number(
         min = 0
 
     if max is None:
-        max = 0
+        max = _BASE62_MAX[length]
 
-        for _ in range(length):
-            max *= 62
-            max += 61
+    value = clamp(value, min, max)
 
-    return to_base_n(clamp(value, min, max), len(alphabet), alphabet).zfill(length)
+    if alphabet is BASE62_ALPHABET and value >= 0:
+        return _to_base62(value).zfill(length)
+
+    return to_base_n(value, len(alphabet), alphabet).zfill(length)
 
 
 def serialize_string(
     value: str,
     length_of_length_field: int,
 ):
-    max_length_of_value = 0
-
-    for _ in range(length_of_length_field):
-        max_length_of_value *= 62
-        max_length_of_value += 61
+    max_length_of_value = _BASE62_MAX[length_of_length_field]
 
-    encoded = ""
+    chunks: list[str] = []
     ascii_mode = False
     prev_ascii_mode = False
 
-    for c in value:
+    for run in _BASE62_RUNS.findall(value):
         prev_ascii_mode = ascii_mode
-        ascii_mode = c in BASE62_ALPHABET
+        ascii_mode = run[0] in _BASE62_CHARS
 
         if prev_ascii_mode != ascii_mode:
-            encoded += "-"
+            chunks.append("-")
 
         if ascii_mode:
-            encoded += c
+            chunks.append(run)
         else:
-            encoded += serialize_number(ord(c), 3)
+            chunks.extend(serialize_number(ord(c), 3) for c in run)
+
+    encoded = "".join(chunks)
 
     return (
         serialize_number(min(len(encoded), max_length_of_value), length_of_length_field)
@@ -225,113 +269,98 @@ class ChunirecCog(commands.Cog, name="chunirec", command_attrs={"hidden": True})
             raise commands.CommandError(msg)
 
         message = await ctx.reply("Fetching player data...", mention_author=False)
-        payload = "06"
+        parts: list[str] = ["06"]
 
-        async with self.utils.chuninet(ctx) as client:
+        async with (
+            self.utils.chuninet(ctx) as client,
+            ProgressMessage(message) as progress,
+        ):
             player_data = await client.player_data()
 
-            payload += serialize_number(player_data.lv, 3, max=9999)
-            payload += serialize_number(
-                int(player_data.rating.current * 100), 3, max=9999
+            parts.append(serialize_number(player_data.lv, 3, max=9999))
+            parts.append(
+                serialize_number(int(player_data.rating.current * 100), 3, max=9999)
             )
-            payload += serialize_number(
-                int(player_data.rating.max * 100) if player_data.rating.max else 0,
-                3,
-                max=9999,
+            parts.append(
+                serialize_number(
+                    int(player_data.rating.max * 100) if player_data.rating.max else 0,
+                    3,
+                    max=9999,
+                )
             )
-            payload += serialize_number(player_data.playcount or 0, 4)
-
-            class_emblem = 0
+            parts.append(serialize_number(player_data.playcount or 0, 4))
 
-            if player_data.medal is not None:
-                class_emblem += player_data.medal.value
-            if player_data.emblem is not None:
-                class_emblem += player_data.emblem.value * 7
+            class_emblem = (
+                0 if player_data.medal is None else player_data.medal.value
+            ) + (0 if player_data.emblem is None else player_data.emblem.value * 7)
 
-            payload += serialize_number(class_emblem, 1, max=48)
-            payload += serialize_number(1 if player_data.team is not None else 0, 1)
+            parts.append(serialize_number(class_emblem, 1, max=48))
+            parts.append("1" if player_data.team is not None else "0")
 
             try:
                 title_rarity = TITLE_RARITIES.index(player_data.nameplate.rarity)
             except ValueError:
                 title_rarity = 0
 
-            payload += "1"  # number of titles set, hardcoded to 1 until VERSE is released in intl
-            payload += serialize_number(title_rarity, 1, max=9)
-            payload += "0"  # seemingly deprecated field
-            payload += "3"  # region index: paralost = 1, intl = 2, jp = 3
-            payload += "0"  # net battle rank
-            payload += "000"  # net battle playcount
-            payload += serialize_string(player_data.name, 2)
+            # number of titles set, hardcoded to 1 until VERSE is released in intl
+            parts.append("1")
+            parts.append(serialize_number(title_rarity, 1, max=9))
+            parts.append(
+                "0"  # seemingly deprecated field
+                "3"  # region index: paralost = 1, intl = 2, jp = 3
+                "0"  # net battle rank
+                "000"  # net battle playcount
+            )
+            parts.append(serialize_string(player_data.name, 2))
 
             # for verse, just serialize all 3 titles
-            payload += serialize_string(player_data.nameplate.content, 2)
+            parts.append(serialize_string(player_data.nameplate.content, 2))
 
-            records: list[Record] = []
+            # CHUNITHM-NET stores each folder search in the session, so the folders
+            # are fetched one at a time. The PB array is prefixed with its total
+            # length, so every folder is held until all of them have been fetched;
+            # they are then serialized in place rather than flattened into one list.
+            folders: list[list[Record]] = []
 
             for difficulty in Difficulty:
-                await message.edit(
-                    content=f"Fetching {difficulty} scores...",
-                    allowed_mentions=AllowedMentions.none(),
-                )
-
-                records.extend(
+                progress.content = f"Fetching {difficulty} scores..."
+                folders.append(
                     await client.music_record_by_folder(difficulty=difficulty)
                 )
 
-            payload += serialize_number(len(records), 3)
-            payload += "S"  # marker for PB array
-
-            for record in records:
-                payload += serialize_number(
-                    record.extras[KEY_SONG_ID] % 20480
-                    + record.difficulty.value * 20480,
-                    3,
-                )
-                payload += serialize_number(record.score, 4, max=1_010_000)
-
-                combo_lamp: ChunirecComboLamp = ChunirecComboLamp(0)
-
-                if record.combo_lamp == ComboType.ALL_JUSTICE_CRITICAL:
-                    combo_lamp |= ChunirecComboLamp.ALL_JUSTICE_CRITICAL
-                elif record.combo_lamp == ComboType.ALL_JUSTICE:
-                    combo_lamp |= ChunirecComboLamp.ALL_JUSTICE
-                elif record.combo_lamp == ComboType.FULL_COMBO:
-                    combo_lamp |= ChunirecComboLamp.FULL_COMBO
-
-                if record.chain_lamp == ChainType.FULL_CHAIN_PLUS:
-                    combo_lamp |= ChunirecComboLamp.FULL_CHAIN_PLUS
-                elif record.chain_lamp == ChainType.FULL_CHAIN:
-                    combo_lamp |= ChunirecComboLamp.FULL_CHAIN
-
-                clear_lamp = ChunirecClearLamp.FAILED
-
-                if record.clear_lamp == ClearType.CLEAR:
-                    clear_lamp = ChunirecClearLamp.CLEAR
-                elif record.clear_lamp == ClearType.HARD:
-                    clear_lamp = ChunirecClearLamp.HARD
-                elif record.clear_lamp == ClearType.ABSOLUTE:
-                    clear_lamp = ChunirecClearLamp.ABSOLUTE
-                elif record.clear_lamp == ClearType.ABSOLUTE_PLUS:
-                    clear_lamp = ChunirecClearLamp.ABSOLUTE_PLUS
-                elif record.clear_lamp == ClearType.CATASTROPHY:
-                    clear_lamp = ChunirecClearLamp.CATASTROPHY
-
-                payload += serialize_number(combo_lamp.value, 1, max=31)
-                payload += serialize_number(clear_lamp.value, 1, max=31)
-
-            await message.edit(
-                content="Fetching courses...",
-                allowed_mentions=AllowedMentions.none(),
-            )
+            parts.append(serialize_number(sum(len(folder) for folder in folders), 3))
+            parts.append("S")  # marker for PB array
+
+            for difficulty, folder in zip(Difficulty, folders):
+                chart_offset = difficulty.value * 20480
+
+                for record in folder:
+                    chart_id = record.extras[KEY_SONG_ID] % 20480 + chart_offset
+                    combo_lamp = _COMBO_LAMPS.get(
+                        record.combo_lamp, 0
+                    ) | _CHAIN_LAMPS.get(record.chain_lamp, 0)
+                    clear_lamp = _CLEAR_LAMPS.get(
+                        record.clear_lamp, ChunirecClearLamp.FAILED.value
+                    )
+
+                    parts.extend(
+                        (
+                            serialize_number(chart_id, 3),
+                            serialize_number(record.score, 4, max=1_010_000),
+                            serialize_number(combo_lamp, 1, max=31),
+                            serialize_number(clear_lamp, 1, max=31),
+                        )
+                    )
+
+            progress.content = "Fetching courses..."
             courses = await client.course_record()
 
-            payload += serialize_number(len(courses), 3)
-            payload += "C"  # marker for course array
+            parts.append(serialize_number(len(courses), 3))
+            parts.append("C")  # marker for course array
 
             for course in courses:
-                payload += serialize_number(course.id, 3)
-                payload += serialize_number(course.score, 4, max=3_030_000)
+                parts.append(serialize_number(course.id, 3))
+                parts.append(serialize_number(course.score, 4, max=3_030_000))
 
                 course_lamp = ChunirecCourseLamp(0)
 
@@ -346,28 +375,31 @@ class ChunirecCog(commands.Cog, name="chunirec", command_attrs={"hidden": True})
                 elif course.combo_lamp == ComboType.FULL_COMBO:
                     course_lamp |= ChunirecCourseLamp.FULL_COMBO
 
-                payload += serialize_number(course_lamp.value, 1, max=7)
+                parts.append(serialize_number(course_lamp.value, 1, max=7))
 
-            await message.edit(
-                content="Fetching recent10...",
-                allowed_mentions=AllowedMentions.none(),
-            )
+            progress.content = "Fetching recent10..."
             recent10 = await client.recent10()
 
-            payload += serialize_number(len(recent10), 3)
-            payload += "R"  # marker for course array
+            parts.append(serialize_number(len(recent10), 3))
+            parts.append("R")  # marker for course array
 
             for recent in recent10:
-                payload += serialize_number(
-                    recent.extras[KEY_SONG_ID] % 20480
-                    + recent.difficulty.value * 20480,
-                    3,
+                chart_id = (
+                    recent.extras[KEY_SONG_ID] % 20480 + recent.difficulty.value * 20480
+                )
+                parts.extend(
+                    (
+                        serialize_number(chart_id, 3),
+                        serialize_number(recent.score, 4, max=1_010_000),
+                    )
                 )
-                payload += serialize_number(recent.score, 4, max=1_010_000)
 
-            payload += "000B"  # unused array, presumably for best30
-            payload += "000O"  # unused array, presumably for best40
+            parts.append(
+                "000B"  # unused array, presumably for best30
+                "000O"  # unused array, presumably for best40
+            )
 
+            payload = "".join(parts)
             payload += serialize_number(binascii.crc32(payload.encode()), 6)
 
         resp = await self.http_client.post(
@@ -384,6 +416,8 @@ class ChunirecCog(commands.Cog, name="chunirec", command_attrs={"hidden": True})
 
         assert "task_id" in data
 
+        self.bot.dispatch("profile_update", ctx.author.id)
+
         await message.edit(
             content="Import complete. Please check in your DMs for a URL to save records to your chunirec account.",
             allowed_mentions=AllowedMentions.none(),
@@ -14,6 +14,7 @@ from database.models import Cookie
 from utils import json_dumps, json_loads
 from utils.config import config
 from utils.logging import logger as root_logger
+from utils.progress import ProgressMessage
 
 if TYPE_CHECKING:
     from bot import ChuniBot
@@ -22,15 +23,23 @@ if TYPE_CHECKING:
 logger = root_logger.getChild(__name__)
 
 
+_TACHI_CLASSES: dict[SkillClass, str] = {
+    SkillClass.I: "DAN_I",
+    SkillClass.II: "DAN_II",
+    SkillClass.III: "DAN_III",
+    SkillClass.IV: "DAN_IV",
+    SkillClass.V: "DAN_V",
+    SkillClass.INFINITE: "DAN_INFINITE",
+}
+_TACHI_COMBO_LAMPS: dict[ComboType, str] = {
+    ComboType.ALL_JUSTICE_CRITICAL: "ALL JUSTICE CRITICAL",
+    ComboType.ALL_JUSTICE: "ALL JUSTICE",
+    ComboType.FULL_COMBO: "FULL COMBO",
+}
+
+
 def to_tachi_class(cls: SkillClass) -> str:
-    return {
-        SkillClass.I: "DAN_I",
-        SkillClass.II: "DAN_II",
-        SkillClass.III: "DAN_III",
-        SkillClass.IV: "DAN_IV",
-        SkillClass.V: "DAN_V",
-        SkillClass.INFINITE: "DAN_INFINITE",
-    }[cls]
+    return _TACHI_CLASSES[cls]
 
 
 class KamaitachiCog(commands.Cog, name="Kamaitachi", command_attrs={"hidden": True}):
@@ -54,6 +63,10 @@ class KamaitachiCog(commands.Cog, name="Kamaitachi", command_attrs={"hidden": Tr
         self.kt_client_id = kt_client_id
         self.kt_client_secret = kt_client_secret
         self.user_agent = f"ChuniPenguin (https://github.com/Rapptz/discord.py {discord.__version__}) Python/{sys.version_info[0]}.{sys.version_info[1]} httpx/{httpx.__version__}"
+        self.http_client = httpx.AsyncClient(headers={"User-Agent": self.user_agent})
+
+    async def cog_unload(self) -> None:
+        await self.http_client.aclose()
 
     @commands.hybrid_group("kamaitachi", aliases=["kt"], invoke_without_command=True)
     async def kamaitachi(self, ctx: Context):
@@ -67,12 +80,11 @@ class KamaitachiCog(commands.Cog, name="Kamaitachi", command_attrs={"hidden": Tr
         )
 
     async def _verify_and_login(self, token: str) -> Optional[str]:
-        async with httpx.AsyncClient() as client:
-            client.headers["User-Agent"] = self.user_agent
-            client.headers["Authorization"] = f"Bearer {token}"
-
-            resp = await client.get("https://kamai.tachi.ac/api/v1/status")
-            data = json_loads(resp.content)
+        resp = await self.http_client.get(
+            "https://kamai.tachi.ac/api/v1/status",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        data = json_loads(resp.content)
 
         if data["success"] is False:
             return data["description"]
@@ -91,10 +103,6 @@ class KamaitachiCog(commands.Cog, name="Kamaitachi", command_attrs={"hidden": Tr
 
     @kamaitachi.command("link", aliases=["login"])
     async def kamaitachi_link(self, ctx: Context, token: Optional[str] = None):
-        async with self.bot.begin_db_session() as session:
-            query = select(Cookie).where(Cookie.discord_id == ctx.author.id)
-            cookie = (await session.execute(query)).scalar_one_or_none()
-
         channel = (
             ctx.author.dm_channel
             if ctx.author.dm_channel
@@ -125,6 +133,9 @@ class KamaitachiCog(commands.Cog, name="Kamaitachi", command_attrs={"hidden": Tr
             content = "Successfully linked with Kamaitachi."
 
             async with self.bot.begin_db_session() as session, session.begin():
+                query = select(Cookie).where(Cookie.discord_id == ctx.author.id)
+                cookie = (await session.execute(query)).scalar_one_or_none()
+
                 if cookie is None:
                     cookie = Cookie(
                         discord_id=ctx.author.id, cookie="", kamaitachi_token=token
@@ -132,7 +143,6 @@ class KamaitachiCog(commands.Cog, name="Kamaitachi", command_attrs={"hidden": Tr
                     session.add(cookie)
                 else:
                     cookie.kamaitachi_token = token
-                    await session.merge(cookie)
 
                     content += (
                         "\nYou can now use `c>kamaitachi sync` to sync your recent scores.\n"
@@ -141,6 +151,7 @@ class KamaitachiCog(commands.Cog, name="Kamaitachi", command_attrs={"hidden": Tr
                         "before syncing your personal bests with `c>kamaitachi sync pb`.**"
                     )
 
+            self.bot.dispatch("profile_update", ctx.author.id)
             return await ctx.reply(
                 content=content,
                 mention_author=False,
@@ -167,29 +178,30 @@ class KamaitachiCog(commands.Cog, name="Kamaitachi", command_attrs={"hidden": Tr
 
     @kamaitachi.command("unlink", aliases=["logout"])
     async def kamaitachi_unlink(self, ctx: Context):
-        async with self.bot.begin_db_session() as session:
+        async with self.bot.begin_db_session() as session, session.begin():
             query = select(Cookie).where(Cookie.discord_id == ctx.author.id)
             cookie = (await session.execute(query)).scalar_one_or_none()
 
-        if cookie is None or cookie.kamaitachi_token is None:
+            linked = False
+
+            if cookie is not None and cookie.kamaitachi_token is not None:
+                cookie.kamaitachi_token = None
+                linked = True
+
+        if not linked:
             return await ctx.reply(
                 content="You are not linked with Kamaitachi.", mention_author=False
             )
 
-        cookie.kamaitachi_token = None
-        async with self.bot.begin_db_session() as session:
-            await session.merge(cookie)
+        self.bot.dispatch("profile_update", ctx.author.id)
 
         return await ctx.reply(
             content="Successfully unlinked with Kamaitachi.", mention_author=False
         )
 
     def _tachi_lamp(self, clear_lamp: ClearType, combo_lamp: ComboType) -> str:
-        if combo_lamp == ComboType.ALL_JUSTICE_CRITICAL:
-            return "ALL JUSTICE CRITICAL"
-
-        if combo_lamp != ComboType.NONE:
-            return str(combo_lamp)
+        if (lamp := _TACHI_COMBO_LAMPS.get(combo_lamp)) is not None:
+            return lamp
 
         if clear_lamp != ClearType.FAILED:
             return "CLEAR"
@@ -229,98 +241,99 @@ class KamaitachiCog(commands.Cog, name="Kamaitachi", command_attrs={"hidden": Tr
         message = await ctx.reply(
             "Fetching scores from CHUNITHM-NET...", mention_author=False
         )
-        async with self.utils.chuninet(
-            ctx
-        ) as chuni_client, httpx.AsyncClient() as tachi_client:
-            tachi_client.headers["User-Agent"] = self.user_agent
-            tachi_client.headers["Authorization"] = f"Bearer {cookie.kamaitachi_token}"
+        tachi_auth = {"Authorization": f"Bearer {cookie.kamaitachi_token}"}
 
+        async with self.utils.chuninet(ctx) as chuni_client:
             profile = await chuni_client.player_data()
 
             if sync == "recent":
                 recents = await chuni_client.recent_record()
+                async with ProgressMessage(message) as progress:
+                    for recent in recents:
+                        if recent.difficulty == Difficulty.WORLDS_END:
+                            continue
 
-                for recent in recents:
-                    if recent.difficulty == Difficulty.WORLDS_END:
-                        continue
-
-                    score_data = {
-                        "score": recent.score,
-                        "lamp": self._tachi_lamp(recent.clear_lamp, recent.combo_lamp),
-                        "matchType": "inGameID",
-                        "identifier": "",
-                        "difficulty": str(recent.difficulty),
-                        "timeAchieved": int(recent.date.timestamp()) * 1000,
-                        "judgements": {},
-                        "hitMeta": {},
-                    }
+                        score_data = {
+                            "score": recent.score,
+                            "lamp": self._tachi_lamp(
+                                recent.clear_lamp, recent.combo_lamp
+                            ),
+                            "matchType": "inGameID",
+                            "identifier": "",
+                            "difficulty": str(recent.difficulty),
+                            "timeAchieved": int(recent.date.timestamp()) * 1000,
+                            "judgements": {},
+                            "hitMeta": {},
+                        }
 
-                    detailed_recent = await chuni_client.detailed_recent_record(recent)
+                        detailed_recent = await chuni_client.detailed_recent_record(
+                            recent
+                        )
 
-                    if (song_id := detailed_recent.extras.get(KEY_SONG_ID)) is None:
-                        continue
+                        if (song_id := detailed_recent.extras.get(KEY_SONG_ID)) is None:
+                            continue
 
-                    score_data["identifier"] = str(song_id)
+                        score_data["identifier"] = str(song_id)
 
-                    score_data["judgements"]["jcrit"] = detailed_recent.judgements.jcrit
-                    score_data["judgements"]["justice"] = (
-                        detailed_recent.judgements.justice
-                    )
-                    score_data["judgements"]["attack"] = (
-                        detailed_recent.judgements.attack
-                    )
-                    score_data["judgements"]["miss"] = detailed_recent.judgements.miss
+                        score_data["judgements"]["jcrit"] = (
+                            detailed_recent.judgements.jcrit
+                        )
+                        score_data["judgements"]["justice"] = (
+                            detailed_recent.judgements.justice
+                        )
+                        score_data["judgements"]["attack"] = (
+                            detailed_recent.judgements.attack
+                        )
+                        score_data["judgements"]["miss"] = (
+                            detailed_recent.judgements.miss
+                        )
 
-                    if (
-                        detailed_recent.judgements.justice == 0
-                        and detailed_recent.judgements.attack == 0
-                        and detailed_recent.judgements.miss == 0
-                    ):
-                        score_data["lamp"] = "ALL JUSTICE CRITICAL"
+                        if (
+                            detailed_recent.judgements.justice == 0
+                            and detailed_recent.judgements.attack == 0
+                            and detailed_recent.judgements.miss == 0
+                        ):
+                            score_data["lamp"] = "ALL JUSTICE CRITICAL"
 
-                    score_data["hitMeta"]["maxCombo"] = detailed_recent.max_combo
+                        score_data["hitMeta"]["maxCombo"] = detailed_recent.max_combo
 
-                    scores.append(score_data)
+                        scores.append(score_data)
 
-                    if len(scores) % 10 == 0:
-                        await message.edit(
-                            content=f"Fetching recent scores from CHUNITHM-NET... {len(scores)}/{len(recents)}",
-                            allowed_mentions=discord.AllowedMentions.none(),
-                        )
+                        progress.content = f"Fetching recent scores from CHUNITHM-NET... {len(scores)}/{len(recents)}"
 
             elif sync == "pb":
-                for difficulty in Difficulty:
-                    if difficulty == Difficulty.WORLDS_END:
-                        # Kamaitachi does not accept WORLD'S END scores
-                        continue
-
-                    await message.edit(
-                        content=f"Fetching {difficulty} scores...",
-                        allowed_mentions=discord.AllowedMentions.none(),
-                    )
+                # CHUNITHM-NET stores each folder search in the session, so the
+                # folders are fetched one at a time.
+                async with ProgressMessage(message) as progress:
+                    for difficulty in Difficulty:
+                        if difficulty == Difficulty.WORLDS_END:
+                            # Kamaitachi does not accept WORLD'S END scores
+                            continue
 
-                    records = await chuni_client.music_record_by_folder(
-                        difficulty=difficulty
-                    )
+                        difficulty_name = str(difficulty)
+                        progress.content = f"Fetching {difficulty_name} scores..."
+                        records = await chuni_client.music_record_by_folder(
+                            difficulty=difficulty
+                        )
 
-                    for score in records:
-                        if (song_id := score.extras.get(KEY_SONG_ID)) is None:
-                            continue
+                        for score in records:
+                            if (song_id := score.extras.get(KEY_SONG_ID)) is None:
+                                continue
 
-                        score_data = {
-                            "score": score.score,
-                            "lamp": self._tachi_lamp(
-                                score.clear_lamp, score.combo_lamp
-                            ),
-                            "matchType": "inGameID",
-                            "identifier": str(song_id),
-                            "difficulty": str(score.difficulty),
-                        }
+                            score_data = {
+                                "score": score.score,
+                                "lamp": self._tachi_lamp(
+                                    score.clear_lamp, score.combo_lamp
+                                ),
+                                "matchType": "inGameID",
+                                "identifier": str(song_id),
+                                "difficulty": difficulty_name,
+                            }
 
-                        if score.score == 1010000:
-                            score_data["lamp"] = "ALL JUSTICE CRITICAL"
+                            if score.score == 1010000:
+                                score_data["lamp"] = "ALL JUSTICE CRITICAL"
 
-                        scores.append(score_data)
+                            scores.append(score_data)
 
             await message.edit(content="Uploading scores to Kamaitachi...")
 
@@ -339,10 +352,16 @@ class KamaitachiCog(commands.Cog, name="Kamaitachi", command_attrs={"hidden": Tr
             if profile.emblem is not None:
                 request_body["classes"]["emblem"] = to_tachi_class(profile.emblem)
 
-            resp = await tachi_client.post(
+            # PB syncs can carry thousands of scores; don't keep the dicts alive
+            # alongside their serialized form for the whole upload.
+            content = json_dumps(request_body)
+            del request_body, scores
+
+            resp = await self.http_client.post(
                 "https://kamai.tachi.ac/ir/direct-manual/import",
-                content=json_dumps(request_body),
+                content=content,
                 headers={
+                    **tachi_auth,
                     "Content-Type": "application/json",
                     "X-User-Intent": "true",
                 },
@@ -357,7 +376,7 @@ class KamaitachiCog(commands.Cog, name="Kamaitachi", command_attrs={"hidden": Tr
             poll_url = data["body"]["url"]
 
             while True:
-                resp = await tachi_client.get(poll_url)
+                resp = await self.http_client.get(poll_url, headers=tachi_auth)
                 data = json_loads(resp.content)
 
                 if not data["success"]:
@@ -376,6 +395,8 @@ class KamaitachiCog(commands.Cog, name="Kamaitachi", command_attrs={"hidden": Tr
                     continue
 
                 if data["body"]["importStatus"] == "completed":
+                    self.bot.dispatch("profile_update", ctx.author.id)
+
                     msg = f"{data['description']} {len(data['body']['import']['scoreIDs'])} scores"
 
                     if len(data["body"]["import"]["errors"]) > 0:
@@ -1,12 +1,14 @@
 import asyncio
-import contextlib
+import operator
+import time
 from argparse import ArgumentError
-from dataclasses import dataclass
-from datetime import UTC, datetime
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from io import BytesIO
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Generic, Optional, TypeVar
 
 import discord
+import msgspec
 from discord import app_commands
 from discord.ext import commands
 from discord.ext.commands import Context
@@ -16,13 +18,19 @@ from chunithm_net.exceptions import ChuniNetError
 from chunithm_net.models.enums import SkillClass
 from utils import shlex_split
 from utils.argparse import DiscordArguments
+from utils.kamaitachi import KTChunithmUserGameStatsResponse, KTUserResponse
 from utils.views.profile import ProfileView
 
 if TYPE_CHECKING:
     from bot import ChuniBot
+    from chunithm_net.models.player_data import PlayerData
     from cogs.botutils import UtilsCog
 
 
+K = TypeVar("K")
+V = TypeVar("V")
+
+
 @dataclass
 class DrawCoordinates:
     sx: int = 0
@@ -33,6 +41,16 @@ class DrawCoordinates:
     height: int = 0
     rotate: int = 0
 
+    crop_box: tuple[int, int, int, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.crop_box = (
+            self.sx,
+            self.sy,
+            self.sx + self.width,
+            self.sy + self.height,
+        )
+
 
 AVATAR_COORDS = {
     "skinfoot_r": DrawCoordinates(
@@ -93,99 +111,222 @@ AVATAR_COORDS = {
     ),
 }
 
+# Shared between invocations: parsing only toggles state that is restored before
+# returning, and none of these arguments have async converters that could yield.
+_CHUNITHM_PARSER = DiscordArguments()
+_CHUNITHM_PARSER.add_argument("-k", "--kamaitachi", action="store_true")
+
+_KT_SKILL_CLASSES = {
+    f"DAN_{name}": member for name, member in SkillClass.__members__.items()
+}
+_AVATAR_ITEMS = ("base", "back", *AVATAR_COORDS)
+_get_avatar_urls = operator.attrgetter(*_AVATAR_ITEMS)
+
+
+def _load_rgba(data: bytes) -> Image.Image:
+    image = Image.open(BytesIO(data))
+    image.load()
 
-def render_avatar(items: dict[str, bytes]) -> BytesIO:
-    avatar = Image.open(BytesIO(items["base"]))
+    # convert() copies even when the mode already matches
+    return image if image.mode == "RGBA" else image.convert("RGBA")
+
+
+def decode_avatar_layers(items: list[bytes]) -> list[Image.Image]:
+    return [_load_rgba(item) for item in items]
+
+
+def render_avatar(items: dict[str, Image.Image]) -> BytesIO:
+    avatar = items["base"]
 
     # crop out the USER AVATAR text at the top
     avatar = avatar.crop((0, 20, avatar.width, avatar.height))
 
-    back = Image.open(BytesIO(items["back"]))
+    back = items["back"]
 
     base_x = int((avatar.width - back.width) / 2)
-    avatar.paste(back, (base_x, 25), back)
+    avatar.alpha_composite(back, (base_x, 25))
 
     for name, coords in AVATAR_COORDS.items():
-        image = Image.open(BytesIO(items[name]))
-        crop = image.crop(
-            (
-                coords.sx,
-                coords.sy,
-                coords.sx + coords.width,
-                coords.sy + coords.height,
+        crop = items[name].crop(coords.crop_box)
+
+        if coords.rotate:
+            crop = crop.rotate(
+                coords.rotate, expand=True, resample=Image.Resampling.BICUBIC
             )
-        ).rotate(coords.rotate, expand=True, resample=Image.Resampling.BICUBIC)
-        avatar.paste(crop, (base_x + coords.dx_offset, coords.dy), crop)
+
+        avatar.alpha_composite(crop, (base_x + coords.dx_offset, coords.dy))
+
+    buffer = BytesIO()
+    avatar.save(buffer, "png", compress_level=1)
+    buffer.seek(0)
+    return buffer
+
+
+def render_thumbnail(character: bytes, charaframe: bytes) -> BytesIO:
+    with Image.open(BytesIO(character)) as image:
+        character_image = image.resize((87, 87), Image.Resampling.LANCZOS)
+    with Image.open(BytesIO(charaframe)) as image:
+        charaframe_image = image.resize((98, 98), Image.Resampling.LANCZOS)
+
+    charaframe_image.paste(character_image, (6, 6), character_image)
 
     buffer = BytesIO()
-    avatar.save(buffer, "png", optimize=True)
+    charaframe_image.save(buffer, "PNG", compress_level=1)
     buffer.seek(0)
     return buffer
 
 
+class ExpiringCache(Generic[K, V]):
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._entries.get(key)
+
+        if entry is None or entry[0] < time.monotonic():
+            return None
+
+        return entry[1]
+
+    def set(self, key: K, value: V) -> None:
+        now = time.monotonic()
+
+        # every entry lives for the same TTL, so keeping them in insertion order
+        # also keeps them in expiry order and only the front can have expired.
+        while self._entries and next(iter(self._entries.values()))[0] < now:
+            self._entries.popitem(last=False)
+
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._entries.pop(key, None)
+
+
 class ProfileCog(commands.Cog, name="Profile"):
     def __init__(self, bot: "ChuniBot") -> None:
         self.bot = bot
         self.utils: "UtilsCog" = self.bot.get_cog("Utils")  # type: ignore[reportGeneralTypeIssues]
 
+        # Decoded avatar layers by URL, least recently used first. Avatar parts
+        # are shared between players and rarely change, so most renders only
+        # need to download and decode a few new layers.
+        self.avatar_layers: OrderedDict[str, Image.Image] = OrderedDict()
+        self.avatar_layers_max_size = 128
+        self.avatar_renders: dict[int, asyncio.Task[tuple[str, bytes]]] = {}
+
+        # Profile data is briefly reused so repeated lookups of the same player
+        # don't refetch it. Entries are dropped on `profile_update` events, which
+        # are dispatched when a player links, unlinks or syncs an account.
+        self.kamaitachi_cards: ExpiringCache[int, discord.Embed] = ExpiringCache(
+            30, 128
+        )
+        self.chunithm_net_profiles: ExpiringCache[
+            int, tuple["PlayerData", Optional[bytes]]
+        ] = ExpiringCache(30, 128)
+
+    @commands.Cog.listener()
+    async def on_profile_update(self, user_id: int):
+        self.kamaitachi_cards.pop(user_id)
+        self.chunithm_net_profiles.pop(user_id)
+
     @commands.hybrid_command(name="avatar")
     async def avatar(
         self, ctx: Context, *, user: Optional[discord.User | discord.Member] = None
     ):
         """View your CHUNITHM avatar."""
-        async with ctx.typing(), self.utils.chuninet(
-            ctx if user is None else user.id
-        ) as client:
-            basic_data = await client.authenticate()
-            avatar_urls = basic_data.avatar
-
-            async def task(url):
-                resp = await client.session.get(url)
-                async with contextlib.aclosing(resp) as resp:
-                    return await resp.aread()
-
-            tasks = [
-                task(avatar_urls.base),
-                task(avatar_urls.back),
-            ]
-            tasks.extend(task(getattr(avatar_urls, name)) for name in AVATAR_COORDS)
-            results = await asyncio.gather(*tasks)
-            items: dict[str, bytes] = dict(
-                zip(
-                    ["base", "back", *AVATAR_COORDS],
-                    results,
-                )
-            )
+        user_id = ctx.author.id if user is None else user.id
+
+        # Repeat invocations for the same player while a render is in flight
+        # wait for that render instead of starting another one.
+        if (task := self.avatar_renders.get(user_id)) is None:
+            task = asyncio.create_task(self._render_avatar(user_id))
+            self.avatar_renders[user_id] = task
+            task.add_done_callback(lambda _: self.avatar_renders.pop(user_id, None))
+
+        async with ctx.typing():
+            name, image = await asyncio.shield(task)
 
-        buffer = await asyncio.to_thread(render_avatar, items)
         await ctx.reply(
-            content=f"Avatar of {basic_data.name}",
-            file=discord.File(buffer, filename="avatar.png"),
+            content=f"Avatar of {name}",
+            file=discord.File(BytesIO(image), filename="avatar.png"),
             mention_author=False,
         )
 
+    async def _render_avatar(self, user_id: int) -> tuple[str, bytes]:
+        async with self.utils.chuninet(user_id) as client:
+            basic_data = await client.authenticate()
+            urls: dict[str, str] = dict(
+                zip(_AVATAR_ITEMS, _get_avatar_urls(basic_data.avatar))
+            )
+
+            layers: dict[str, Image.Image] = {
+                url: layer
+                for url in urls.values()
+                if (layer := self.avatar_layers.get(url)) is not None
+            }
+            missing = [url for url in dict.fromkeys(urls.values()) if url not in layers]
+
+            responses = await asyncio.gather(
+                *(client.session.get(url) for url in missing)
+            )
+
+        decoded = await asyncio.to_thread(
+            decode_avatar_layers, [resp.content for resp in responses]
+        )
+        layers.update(zip(missing, decoded))
+
+        for url, layer in layers.items():
+            self.avatar_layers[url] = layer
+            self.avatar_layers.move_to_end(url)
+        while len(self.avatar_layers) > self.avatar_layers_max_size:
+            self.avatar_layers.popitem(last=False)
+
+        buffer = await asyncio.to_thread(
+            render_avatar, {name: layers[url] for name, url in urls.items()}
+        )
+        # the result is shared by every command waiting on this render, and each
+        # reply needs its own file object, so hand out the immutable PNG bytes.
+        # getvalue() passes BytesIO's internal buffer on without copying it when
+        # nothing else references it, and BytesIO(bytes) shares it until written to.
+        return basic_data.name, buffer.getvalue()
+
     async def _kamaitachi_profile_card(self, user_id: int):
-        async with self.utils.kamaitachi_client(user_id) as client:
-            resp = await client.get("https://kamai.tachi.ac/api/v1/users/me")
-            data = resp.json()
+        if (embed := self.kamaitachi_cards.get(user_id)) is not None:
+            return embed.copy()
+
+        tachi_auth = await self.utils.kamaitachi_auth(user_id)
+        client = self.utils.kamaitachi_http_client
+        me_resp, stats_resp = await asyncio.gather(
+            client.get("https://kamai.tachi.ac/api/v1/users/me", headers=tachi_auth),
+            client.get(
+                "https://kamai.tachi.ac/api/v1/users/me/games/chunithm/Single",
+                headers=tachi_auth,
+            ),
+        )
 
-            if not data["success"]:
-                msg = f"Could not get Kamaitachi profile: {data['description']}"
-                raise commands.CommandError(msg)
+        me = msgspec.json.decode(me_resp.content, type=KTUserResponse)
 
-            user_id = data["body"]["id"]
-            username = data["body"]["username"]
+        if not me.success or me.body is None:
+            msg = f"Could not get Kamaitachi profile: {me.description}"
+            raise commands.CommandError(msg)
 
-            resp = await client.get(
-                "https://kamai.tachi.ac/api/v1/users/me/games/chunithm/Single"
-            )
-            data = resp.json()
+        username = me.body.username
+
+        data = msgspec.json.decode(
+            stats_resp.content, type=KTChunithmUserGameStatsResponse
+        )
 
-            if not data["success"]:
-                msg = f"Could not get Kamaitachi game stats: {data['description']}"
-                raise commands.CommandError(msg)
+        if not data.success or data.body is None:
+            msg = f"Could not get Kamaitachi game stats: {data.description}"
+            raise commands.CommandError(msg)
 
-            stats = data["body"]
+        stats = data.body
 
         embed = discord.Embed(
             title=username,
@@ -194,105 +335,105 @@ class ProfileCog(commands.Cog, name="Profile"):
         )
         description = ""
 
-        if "dan" in stats["gameStats"]["classes"]:
-            medal = getattr(
-                SkillClass, stats["gameStats"]["classes"]["dan"].replace("DAN_", "")
-            )
+        classes = stats.game_stats.classes
+
+        if classes.dan is not None:
+            medal = _KT_SKILL_CLASSES[classes.dan]
             description = f"Class {medal}"
 
-            if "emblem" in stats["gameStats"]["classes"]:
-                emblem = getattr(
-                    SkillClass,
-                    stats["gameStats"]["classes"]["emblem"].replace("DAN_", ""),
-                )
+            if classes.emblem is not None:
+                emblem = _KT_SKILL_CLASSES[classes.emblem]
                 description += f", cleared all of class {emblem}"
 
             description += "."
 
         description = (
             f"{description}\n"
-            f"▸ **NaiveRating**: {stats['gameStats']['ratings']['naiveRating']:.2f}\n"
-            f"▸ **Scores**: {stats['totalScores']}\n"
-            f"▸ **Session Playtime**: {stats['playtime'] // (60 * 60 * 1000)} hours\n"
+            f"▸ **NaiveRating**: {stats.game_stats.ratings.naive_rating:.2f}\n"
+            f"▸ **Scores**: {stats.total_scores}\n"
+            f"▸ **Session Playtime**: {stats.playtime // (60 * 60 * 1000)} hours\n"
         )
 
         if (
-            stats["mostRecentScore"] is not None
-            and stats["mostRecentScore"]["timeAchieved"] is not None
+            stats.most_recent_score is not None
+            and stats.most_recent_score.time_achieved is not None
         ):
-            ts = datetime.fromtimestamp(
-                stats["mostRecentScore"]["timeAchieved"] / 1000, tz=UTC
-            )
-            last_played = f"<t:{int(ts.timestamp())}:f>"
+            last_played = f"<t:{stats.most_recent_score.time_achieved // 1000}:f>"
             description += f"▸ **Last played**: {last_played}\n"
 
         embed.description = description
+        self.kamaitachi_cards.set(user_id, embed.copy())
 
         return embed
 
-    async def _chunithm_net_profile_card(self, user_id: int):
+    async def _fetch_chunithm_net_profile(
+        self, user_id: int
+    ) -> tuple["PlayerData", Optional[bytes]]:
         async with self.utils.chuninet(user_id) as client:
             player_data = await client.player_data()
 
-            optional_data: list[str] = []
-            if player_data.team is not None:
-                optional_data.append(f"Team {player_data.team.name}")
-            if player_data.medal is not None:
-                content = f"Class {player_data.medal}"
-                if player_data.emblem is not None:
-                    content += f", cleared all of class {player_data.emblem}"
-                content += "."
-                optional_data.append(content)
-            optional_data_joined = "\n".join(optional_data)
-
-            level = str(player_data.lv)
-            if player_data.reborn > 0:
-                level = f"{player_data.reborn}⭐ + {level}"
-
-            description = (
-                f"{optional_data_joined}\n"
-                f"▸ **Level**: {level}\n"
-                f"▸ **Rating**: {player_data.rating.current:.2f} (MAX {player_data.rating.max:.2f})\n"
-                f"▸ **OVER POWER**: {player_data.overpower.value:.2f} ({player_data.overpower.progress * 100:.2f}%)\n"
-                f"▸ **Plays**: {player_data.playcount}\n"
+            if player_data.character is None or player_data.character_frame is None:
+                return player_data, None
+
+            character_resp, charaframe_resp = await asyncio.gather(
+                client.session.get(player_data.character),
+                client.session.get(player_data.character_frame),
             )
 
-            if player_data.last_play_date:
-                description += f"▸ **Last played**: <t:{int(player_data.last_play_date.timestamp())}:f>\n"
-
-            embed = discord.Embed(
-                title=player_data.name,
-                description=description,
-                color=player_data.possession.color(),
-            ).set_author(name=player_data.nameplate.content)
-
-            if player_data.character_frame is None:
-                files = []
-                embed = embed.set_thumbnail(url=player_data.character)
-            elif player_data.character is not None:
-                character_resp, charaframe_resp = await asyncio.gather(
-                    client.session.get(player_data.character),
-                    client.session.get(player_data.character_frame),
-                )
+        thumbnail = await asyncio.to_thread(
+            render_thumbnail, character_resp.content, charaframe_resp.content
+        )
+        return player_data, thumbnail.getvalue()
 
-                character = Image.open(BytesIO(character_resp.content))
-                charaframe = Image.open(BytesIO(charaframe_resp.content))
+    async def _chunithm_net_profile_card(self, user_id: int):
+        # the rendered thumbnail is cached with the player data so a cache hit
+        # doesn't need a CHUNITHM-NET session at all.
+        if (profile := self.chunithm_net_profiles.get(user_id)) is None:
+            profile = await self._fetch_chunithm_net_profile(user_id)
+            self.chunithm_net_profiles.set(user_id, profile)
+
+        player_data, thumbnail = profile
+
+        optional_data: list[str] = []
+        if player_data.team is not None:
+            optional_data.append(f"Team {player_data.team.name}")
+        if player_data.medal is not None:
+            content = f"Class {player_data.medal}"
+            if player_data.emblem is not None:
+                content += f", cleared all of class {player_data.emblem}"
+            content += "."
+            optional_data.append(content)
+        optional_data_joined = "\n".join(optional_data)
+
+        level = str(player_data.lv)
+        if player_data.reborn > 0:
+            level = f"{player_data.reborn}⭐ + {level}"
 
-                character = character.resize((87, 87), Image.Resampling.LANCZOS)
-                charaframe = charaframe.resize((98, 98), Image.Resampling.LANCZOS)
+        description = (
+            f"{optional_data_joined}\n"
+            f"▸ **Level**: {level}\n"
+            f"▸ **Rating**: {player_data.rating.current:.2f} (MAX {player_data.rating.max:.2f})\n"
+            f"▸ **OVER POWER**: {player_data.overpower.value:.2f} ({player_data.overpower.progress * 100:.2f}%)\n"
+            f"▸ **Plays**: {player_data.playcount}\n"
+        )
 
-                charaframe.paste(character, (6, 6), character)
+        if player_data.last_play_date:
+            description += f"▸ **Last played**: <t:{int(player_data.last_play_date.timestamp())}:f>\n"
 
-                avatar = BytesIO()
-                charaframe.save(avatar, "PNG", optimize=True)
-                avatar.seek(0)
+        embed = discord.Embed(
+            title=player_data.name,
+            description=description,
+            color=player_data.possession.color(),
+        ).set_author(name=player_data.nameplate.content)
 
-                files = [discord.File(avatar, filename="avatar.png")]
-                embed = embed.set_thumbnail(url="attachment://avatar.png")
-            else:
-                files = []
+        files = []
+        if player_data.character_frame is None:
+            embed = embed.set_thumbnail(url=player_data.character)
+        elif thumbnail is not None:
+            files = [discord.File(BytesIO(thumbnail), filename="avatar.png")]
+            embed = embed.set_thumbnail(url="attachment://avatar.png")
 
-            return player_data, embed, files
+        return player_data, embed, files
 
     async def _chunithm_inner(
         self,
@@ -334,21 +475,17 @@ class ProfileCog(commands.Cog, name="Profile"):
         `-k, --kamaitachi`: Whether to view their Kamaitachi CHUNITHM profile instead.
         """
 
-        parser = DiscordArguments()
-        parser.add_argument("-k", "--kamaitachi", action="store_true")
-
         try:
-            args, rest = await parser.parse_known_intermixed_args(shlex_split(query))
+            args, rest = await _CHUNITHM_PARSER.parse_known_intermixed_args(
+                shlex_split(query)
+            )
         except ArgumentError as e:
             raise commands.BadArgument(str(e)) from e
 
         user = None
 
         if len(rest) > 0:
-            for converter in [commands.MemberConverter, commands.UserConverter]:
-                with contextlib.suppress(commands.BadArgument):
-                    user = await converter().convert(ctx, rest[0])
-                    break
+            user = await self.utils.resolve_user(ctx, rest[0])
 
         await self._chunithm_inner(ctx, user, kamaitachi=args.kamaitachi)
 
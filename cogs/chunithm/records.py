@@ -1,13 +1,15 @@
 import asyncio
 import contextlib
+import functools
 import itertools
+import re
 import urllib.parse
 from argparse import ArgumentError
 from datetime import UTC, datetime
 from decimal import Decimal
 from io import BytesIO
 from pathlib import Path
-from typing import TYPE_CHECKING, Literal, Optional, cast
+from typing import TYPE_CHECKING, Callable, Literal, Optional, cast
 
 import discord
 from discord import AllowedMentions, Interaction, app_commands
@@ -54,6 +56,24 @@ if TYPE_CHECKING:
     from cogs.botutils import UtilsCog
 
 
+_JACKET_BASES = (JACKET_BASE, INTERNATIONAL_JACKET_BASE)
+# rank names as typed by users, e.g. "sss+" or "SSS+"
+_RANKS_BY_NAME = {
+    key: rank
+    for name, rank in Rank.__members__.items()
+    for key in (name.replace("p", "+"), name.replace("p", "+").lower())
+}
+# difficulties by the first three letters users type, e.g. "mas" or "WORLD'S END"
+_DIFFICULTIES_BY_PREFIX = {
+    key: difficulty
+    for prefix, difficulty in (
+        *((d.short_form(), d) for d in Difficulty),
+        ("WOR", Difficulty.WORLDS_END),
+    )
+    for key in (prefix, prefix.lower())
+}
+_LEVEL = re.compile(r"([0-9]{1,2})(?:(\.[0-9]+)|(\+))?")
+
 ASSETS_DIR = Path(__file__).parent.parent.parent / "assets"
 NOTO_SANS_JP_80 = ImageFont.truetype(
     ASSETS_DIR / "fonts" / "NotoSansJP-Regular.ttf", 80
@@ -67,43 +87,44 @@ NOTO_SANS_JP_32_BOLD = ImageFont.truetype(
 INTER_32 = ImageFont.truetype(ASSETS_DIR / "fonts" / "Inter_28pt-Regular.ttf", 32)
 B30_ENTRY_WIDTH = 350
 B30_ENTRY_HEIGHT = 180
+B30_IMAGE_WIDTH = 1872
+B30_IMAGE_HEIGHT = 1784
+
+# top left corner of each b30 entry
+# - the initial 30 is left/top margin, below the header
+# - the (i % 5) and (i // 5) are the b30's position on the grid, so this goes
+# left to right, top to bottom
+# - the width/height is added by 15 to space out the entries
+B30_ENTRY_POSITIONS = [
+    (
+        30 + (i % 5) * (B30_ENTRY_WIDTH + 15),
+        30 + (B30_IMAGE_HEIGHT * 12 // 100) + (i // 5) * (B30_ENTRY_HEIGHT + 15),
+    )
+    for i in range(30)
+]
 
 
-class reversor:
-    def __init__(self, obj):
-        self.obj = obj
-
-    def __eq__(self, other):
-        return other.obj == self.obj
-
-    def __lt__(self, other):
-        return other.obj < self.obj
-
-
-def render_b30(
-    player_name: str,
-    records: list[Record],
-    current_rating: float | None = None,
-    max_rating: float | None = None,
-):
-    b30_image = Image.new("RGBA", size=(1872, 1784), color="#FFFFFF")
-    b30_draw = ImageDraw.Draw(b30_image)
+# the b30 canvas with everything that doesn't depend on the player already drawn
+@functools.cache
+def _load_b30_template() -> Image.Image:
+    template = Image.new(
+        "RGBA", size=(B30_IMAGE_WIDTH, B30_IMAGE_HEIGHT), color="#FFFFFF"
+    )
+    template_draw = ImageDraw.Draw(template)
 
     with Image.open(ASSETS_DIR / "b30_bg.png") as im:
-        im = im.resize((im.width * b30_image.height // im.height, b30_image.height))
-        b30_image.paste(im.filter(ImageFilter.GaussianBlur(8)))
+        im = im.resize((im.width * template.height // im.height, template.height))
+
+    template.paste(im.filter(ImageFilter.GaussianBlur(8)))
 
     # header: player name and credits
     # draw a background for the player name
-    b30_draw.rectangle(
-        (0, 0, b30_image.width, b30_image.height * 7 // 100), fill="#F2ACE0"
+    template_draw.rectangle(
+        (0, 0, template.width, template.height * 7 // 100), fill="#F2ACE0"
     )
 
-    # draw the player name
-    b30_draw.text((20, 0), player_name, fill="#000000", font=NOTO_SANS_JP_80)
-
     # determine the width/height of the credits text to right-align it with Math
-    credits_bbox = b30_draw.multiline_textbbox(
+    credits_bbox = template_draw.multiline_textbbox(
         (0, 0),
         "Generated by chuni penguin#3217\nhttps://chunithm.beerpsi.cc/invite",
         INTER_32,
@@ -113,10 +134,10 @@ def render_b30(
     credits_height = credits_bbox[3] - credits_bbox[1]
 
     # draw the credit text
-    b30_draw.multiline_text(
+    template_draw.multiline_text(
         (
-            b30_image.width - credits_width - 30,
-            (b30_image.height * 7 // 100 - credits_height) // 2 - 6,
+            template.width - credits_width - 30,
+            (template.height * 7 // 100 - credits_height) // 2 - 6,
         ),
         "Generated by chuni penguin#3217\nhttps://chunithm.beerpsi.cc/invite",
         fill="#000000",
@@ -124,6 +145,166 @@ def render_b30(
         spacing=12,
     )
 
+    # subheader: rating information and generation date
+    # draw a background for the subheader
+    template_draw.rectangle(
+        (0, template.height * 7 // 100, template.width, template.height * 12 // 100),
+        fill="#F2D0F0",
+    )
+
+    return template
+
+
+@functools.cache
+def _load_b30_jacket_shadow() -> Image.Image:
+    shadow = Image.new("RGBA", (B30_ENTRY_WIDTH + 20, B30_ENTRY_HEIGHT + 20))
+    shadow.paste((0, 0, 0, 200), (5, 5, B30_ENTRY_WIDTH + 15, B30_ENTRY_HEIGHT + 15))
+
+    for _ in range(5):
+        shadow = shadow.filter(ImageFilter.GaussianBlur)
+
+    # pasting the shadow onto a transparent layer using itself as the mask fades
+    # its edges (alpha is applied twice), which is how the b30 shadows look.
+    faded = Image.new("RGBA", shadow.size)
+    faded.paste(shadow, (0, 0), shadow)
+
+    return faded
+
+
+# the triangle is drawn on its own mask instead of on the b30 image, so that when
+# it's pasted it stays flush with the top right corner of the jacket instead of
+# being slightly off by 1-2 pixels
+@functools.cache
+def _load_b30_difficulty_triangle() -> Image.Image:
+    triangle = Image.new("L", (55, 55))
+    ImageDraw.Draw(triangle).polygon([(0, 0), (55, 0), (55, 55)], 255)
+
+    return triangle
+
+
+# Jackets are shared between players' b30s, so the darkened and blurred versions
+# are kept around. Failed loads raise and are not cached.
+@functools.lru_cache(maxsize=128)
+def _load_b30_jacket(song_id: int) -> Image.Image:
+    with Image.open(ASSETS_DIR / "jackets" / f"{song_id}.png") as jacket:
+        # convert the jacket to RGB since ImageEnhance explodes in different modes
+        # resize the jacket to B30_ENTRY_WIDTH so we can crop the center out
+        jacket = jacket.convert("RGB").resize(
+            (B30_ENTRY_WIDTH, jacket.height * B30_ENTRY_WIDTH // jacket.width)
+        )
+
+    # crop the center so we have a B30_ENTRY_WIDTH * B30_ENTRY_HEIGHT image
+    jacket = jacket.crop(
+        (
+            (jacket.width - B30_ENTRY_WIDTH) // 2,
+            (jacket.height - B30_ENTRY_HEIGHT) // 2,
+            (jacket.width + B30_ENTRY_WIDTH) // 2,
+            (jacket.height + B30_ENTRY_HEIGHT) // 2,
+        )
+    )
+
+    # darken the image and blur it
+    return (
+        ImageEnhance.Brightness(jacket)
+        .enhance(0.45)
+        .filter(ImageFilter.GaussianBlur(4))
+    )
+
+
+def _shorten_b30_title(draw: ImageDraw.ImageDraw, title: str) -> str:
+    # if the title doesn't fit the b30 entry rectangle, shorten it until it fits.
+    # measuring text is relatively expensive, so the cut-off point is binary
+    # searched instead of dropping one character at a time.
+    max_length = B30_ENTRY_WIDTH - 15
+
+    if draw.textlength(title, NOTO_SANS_JP_32_BOLD) <= max_length:
+        return title
+
+    low, high = 0, len(title) - 1
+
+    while low < high:
+        middle = (low + high + 1) // 2
+
+        if draw.textlength(title[:middle] + "...", NOTO_SANS_JP_32_BOLD) <= max_length:
+            low = middle
+        else:
+            high = middle - 1
+
+    return title[:low] + "..."
+
+
+def _sort_key_rating(record: Record):
+    return (
+        record.extras.get(KEY_PLAY_RATING),
+        record.score,
+        record.extras.get(KEY_OVERPOWER_BASE),
+    )
+
+
+def _sort_key_score(record: Record):
+    return (
+        record.score,
+        record.extras.get(KEY_PLAY_RATING),
+        record.extras.get(KEY_OVERPOWER_BASE),
+    )
+
+
+def _sort_key_overpower(record: Record):
+    return (
+        record.extras.get(KEY_OVERPOWER_BASE),
+        record.extras.get(KEY_PLAY_RATING),
+        record.score,
+    )
+
+
+def _sort_key_overpower_percent(record: Record):
+    return (
+        record.extras[KEY_OVERPOWER_BASE] / record.extras[KEY_OVERPOWER_MAX],
+        record.extras.get(KEY_OVERPOWER_BASE),
+        record.extras.get(KEY_PLAY_RATING),
+        record.score,
+    )
+
+
+# sort names accepted by both the prefix and slash top commands
+_SORT_KEYS: dict[str, Callable[[Record], tuple]] = {
+    "rating": _sort_key_rating,
+    "score": _sort_key_score,
+    "op": _sort_key_overpower,
+    "overpower": _sort_key_overpower,
+    "op_percent": _sort_key_overpower_percent,
+    "overpower_percent": _sort_key_overpower_percent,
+    "overpower %": _sort_key_overpower_percent,
+}
+
+
+class reversor:
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __eq__(self, other):
+        return other.obj == self.obj
+
+    def __lt__(self, other):
+        return other.obj < self.obj
+
+
+def render_b30(
+    player_name: str,
+    records: list[Record],
+    current_rating: float | None = None,
+    max_rating: float | None = None,
+):
+    # one timestamp for the whole render, so the header date and the relative
+    # play times are consistent with each other.
+    now = datetime.now(UTC)
+
+    b30_image = _load_b30_template().copy()
+    b30_draw = ImageDraw.Draw(b30_image)
+
+    # draw the player name
+    b30_draw.text((20, 0), player_name, fill="#000000", font=NOTO_SANS_JP_80)
+
     total_rating = sum(
         (item.extras[KEY_PLAY_RATING] for item in records), start=Decimal(0)
     )
@@ -131,12 +312,6 @@ def render_b30(
     average = floor_to_ndp(total_rating / len(records), 4)
     reachable = floor_to_ndp(total_rating / 40 + max_play_rating / 4, 4)
 
-    # subheader: rating information and generation date
-    # draw a background for the subheader
-    b30_draw.rectangle(
-        (0, b30_image.height * 7 // 100, b30_image.width, b30_image.height * 12 // 100),
-        fill="#F2D0F0",
-    )
     # draw the rating information in the subheader
     rating_text = f"AVERAGE {average:.4f} / REACHABLE {reachable:.4f}"
 
@@ -154,7 +329,7 @@ def render_b30(
     )
 
     # determine the size of the timestamp to properly right-align it
-    updated_text = f"Generated at {datetime.now(UTC).strftime('%Y-%m-%d')}"
+    updated_text = f"Generated at {now:%Y-%m-%d}"
     updated_length = b30_draw.textlength(updated_text, INTER_32)
 
     b30_draw.text(
@@ -168,104 +343,46 @@ def render_b30(
     )
 
     # best30
-    # add a gaussian blurred shadow onto the jacket
-    # generate the base shadow here so we can just copy it for each jacket later
-    jacket_shadow_base = Image.new(
-        "RGBA", (B30_ENTRY_WIDTH + 20, B30_ENTRY_HEIGHT + 20)
-    )
-    jacket_shadow_base.paste(
-        (0, 0, 0, 200), (5, 5, B30_ENTRY_WIDTH + 15, B30_ENTRY_HEIGHT + 15)
-    )
-
-    for _ in range(5):
-        jacket_shadow_base = jacket_shadow_base.filter(ImageFilter.GaussianBlur)
-
-    for i, record in enumerate(records):
-        # top left corner of each b30 entry
-        # - the initial 30 is left/top margin
-        # - the (i % 5) and (i // 5) are the b30's position on the grid, so this goes
-        # left to right, top to bottom
-        # - the width/height is added by 15 to space out the entries
-        x = 30 + (i % 5) * (B30_ENTRY_WIDTH + 15)
-        y = 30 + (b30_image.height * 12 // 100) + (i // 5) * (B30_ENTRY_HEIGHT + 15)
-
-        jacket_path = ASSETS_DIR / "jackets" / f"{record.extras[KEY_SONG_ID]}.png"
+    # the base shadow is generated once so we can just copy it for each jacket
+    jacket_shadow_base = _load_b30_jacket_shadow()
+    difficulty_triangle = _load_b30_difficulty_triangle()
 
+    for i, (record, (x, y)) in enumerate(zip(records, B30_ENTRY_POSITIONS)):
         # we use try/catch on jacket processing to gracefully fail to a black image
         # if the jacket is missing or corrupted
         try:
-            with Image.open(jacket_path) as jacket:
-                # convert the jacket to RGB since ImageEnhance explodes in different modes
-                # resize the jacket to B30_ENTRY_WIDTH so we can crop the center out
-                jacket = jacket.convert("RGB").resize(
-                    (B30_ENTRY_WIDTH, jacket.height * B30_ENTRY_WIDTH // jacket.width)
-                )
-
-                # crop the center so we have a B30_ENTRY_WIDTH * B30_ENTRY_HEIGHT image
-                jacket = jacket.crop(
-                    (
-                        (jacket.width - B30_ENTRY_WIDTH) // 2,
-                        (jacket.height - B30_ENTRY_HEIGHT) // 2,
-                        (jacket.width + B30_ENTRY_WIDTH) // 2,
-                        (jacket.height + B30_ENTRY_HEIGHT) // 2,
-                    )
-                )
-
-                # darken the image and blur it
-                jacket = (
-                    ImageEnhance.Brightness(jacket)
-                    .enhance(0.45)
-                    .filter(ImageFilter.GaussianBlur(4))
-                )
+            jacket = _load_b30_jacket(record.extras[KEY_SONG_ID])
         except (FileNotFoundError, ValueError):
             # fallback to a black background if anything fails
             jacket = Image.new("RGB", (B30_ENTRY_WIDTH, B30_ENTRY_HEIGHT), 0)
 
-        # draw the difficulty colored triangle on the jacket, instead of on the b30 image.
-        # this ensures that the triangle is flush with the top right corner of the jacket instead of
-        # being slightly off by 1-2 pixels
+        # add a gaussian blurred shadow onto the jacket
+        jacket_shadow = jacket_shadow_base.copy()
+
+        jacket_shadow.paste(jacket, (10, 10))
+
+        # fill the difficulty colored triangle in the top right corner of the jacket
         difficulty_color = record.difficulty.color()
-        jacket_draw = ImageDraw.Draw(jacket)
-        jacket_draw.polygon(
-            [
-                (jacket.width - 55, 0),
-                (jacket.width, 0),
-                (jacket.width, 55),
-            ],
+        jacket_shadow.paste(
             # difficulty_color is a number of type 0xRRGGBB, but Pillow expects 0xBBGGRR when
             # passing a number.
             (
                 (difficulty_color >> 16) & 0xFF,
                 (difficulty_color >> 8) & 0xFF,
                 difficulty_color & 0xFF,
+                0xFF,
             ),
+            (10 + B30_ENTRY_WIDTH - difficulty_triangle.width, 10),
+            difficulty_triangle,
         )
 
-        # add a gaussian blurred shadow onto the jacket
-        jacket_shadow = jacket_shadow_base.copy()
-
-        jacket_shadow.paste(jacket, (10, 10))
-
-        jacket_padded = Image.new("RGBA", (b30_image.width, b30_image.height))
-
-        jacket_padded.paste(jacket_shadow, (x - 10, y - 10), jacket_shadow)
-
-        # finally, paste the edited jacket onto the image.
-        b30_image = Image.alpha_composite(b30_image, jacket_padded)
-        b30_draw = ImageDraw.Draw(b30_image)
-
-        # if the title doesn't fit the b30 entry rectangle, shorten it until it fits.
-        title = record.title
-        title_length = b30_draw.textlength(title, NOTO_SANS_JP_32_BOLD)
-
-        while title_length > B30_ENTRY_WIDTH - 15:
-            title = title[:-1]
-            title_length = b30_draw.textlength(title + "...", NOTO_SANS_JP_32_BOLD)
+        # finally, composite the edited jacket onto the image in place.
+        b30_image.alpha_composite(jacket_shadow, (x - 10, y - 10))
 
         # draw the title
         b30_draw.text(
             (x + 10, y + 7),
-            title + ("..." if title != record.title else ""),
+            _shorten_b30_title(b30_draw, record.title),
             fill="#FFFFFF",
             font=NOTO_SANS_JP_32_BOLD,
         )
@@ -336,7 +453,7 @@ def render_b30(
 
         # draw the timestamp
         if isinstance(record, RecentRecord) and record.date.timestamp() > 0:
-            difference = datetime.now(UTC) - record.date
+            difference = now - record.date
 
             if difference.days >= 365:
                 delta = f"{difference.days // 365}y"
@@ -363,11 +480,14 @@ def render_b30(
             )
 
     # crop any extra bits we don't need, however we might need them later...
-    b30_image = b30_image.crop((0, 0, b30_image.width, 1429))
+    # the canvas is fully opaque, so the alpha channel is dropped before encoding.
+    b30_image = b30_image.crop((0, 0, b30_image.width, 1429)).convert("RGB")
 
     buffer = BytesIO()
 
-    b30_image.save(buffer, "PNG", optimize=True)
+    # optimize=True spends seconds squeezing out a few hundred kilobytes; the
+    # fastest zlib level keeps encoding well under a second.
+    b30_image.save(buffer, "PNG", compress_level=1)
     buffer.seek(0)
 
     return buffer
@@ -390,42 +510,46 @@ class RecordsCog(commands.Cog, name="Records"):
 
         async with ctx.typing():
             if kamaitachi:
-                async with self.utils.kamaitachi_client(target_id) as client:
-                    resp = await client.get("https://kamai.tachi.ac/api/v1/users/me")
-                    data = resp.json()
+                tachi_auth = await self.utils.kamaitachi_auth(target_id)
+                client = self.utils.kamaitachi_http_client
+                resp = await client.get(
+                    "https://kamai.tachi.ac/api/v1/users/me", headers=tachi_auth
+                )
+                data = resp.json()
 
-                    if not data["success"]:
-                        msg = f"Could not get user information from Kamaitachi: {data['success']}"
-                        raise commands.CommandError(msg)
+                if not data["success"]:
+                    msg = f"Could not get user information from Kamaitachi: {data['success']}"
+                    raise commands.CommandError(msg)
 
-                    username = data["body"]["username"]
+                username = data["body"]["username"]
 
-                    resp = await client.get(
-                        "https://kamai.tachi.ac/api/v1/users/me/games/chunithm/Single/scores/recent"
-                    )
-                    data = resp.json()
+                resp = await client.get(
+                    "https://kamai.tachi.ac/api/v1/users/me/games/chunithm/Single/scores/recent",
+                    headers=tachi_auth,
+                )
+                data = resp.json()
 
-                    if not data["success"]:
-                        msg = f"Could not retrieve recent scores from Kamaitachi: {data['description']}"
-                        raise commands.CommandError(msg)
+                if not data["success"]:
+                    msg = f"Could not retrieve recent scores from Kamaitachi: {data['description']}"
+                    raise commands.CommandError(msg)
 
-                    recents = convert_kt_scores_to_records(data["body"])
-                    recents = await self.utils.hydrate_records(recents)
+                recents = convert_kt_scores_to_records(data["body"])
+                recents = await self.utils.hydrate_records(recents)
 
-                    view = B30View(
-                        ctx,
-                        recents,
-                        show_average=False,
-                        show_reachable=False,
-                        show_lamps=True,
-                    )
-                    view.message = await ctx.reply(
-                        content=f"Most recent scores for {username} on Kamaitachi:",
-                        embeds=view.format_page(view.items[: view.per_page]),
-                        view=view,
-                        mention_author=False,
-                    )
-                    return
+                view = B30View(
+                    ctx,
+                    recents,
+                    show_average=False,
+                    show_reachable=False,
+                    show_lamps=True,
+                )
+                view.message = await ctx.reply(
+                    content=f"Most recent scores for {username} on Kamaitachi:",
+                    embeds=view.format_page(view.items[: view.per_page]),
+                    view=view,
+                    mention_author=False,
+                )
+                return
 
             ctxmgr = self.utils.chuninet(target_id)
             client = await ctxmgr.__aenter__()
@@ -509,20 +633,17 @@ class RecordsCog(commands.Cog, name="Records"):
                     cast(int, ctx.message.reference.message_id)
                 )
             else:
+                message = None
+
                 try:
-                    messages = [
-                        x
-                        async for x in ctx.channel.history(limit=50)
-                        if x.author == self.bot.user
-                        and any(
+                    async for x in ctx.channel.history(limit=50):
+                        if x.author == self.bot.user and any(
                             e.thumbnail.url is not None
-                            and (
-                                JACKET_BASE in e.thumbnail.url
-                                or INTERNATIONAL_JACKET_BASE in e.thumbnail.url
-                            )
+                            and e.thumbnail.url.startswith(_JACKET_BASES)
                             for e in x.embeds
-                        )
-                    ]
+                        ):
+                            message = x
+                            break
                 except discord.errors.Forbidden as e:
                     msg = (
                         "Bot requires the Read Message History permission to fetch recent scores. "
@@ -530,12 +651,10 @@ class RecordsCog(commands.Cog, name="Records"):
                     )
                     raise commands.CheckFailure(msg) from e
 
-                if len(messages) == 0:
+                if message is None:
                     msg = "No recent scores found."
                     raise commands.BadArgument(msg)
 
-                message = messages[0]
-
             thumbnail_urls = []
             for e in message.embeds:
                 if e.thumbnail.url is not None:
@@ -611,40 +730,44 @@ class RecordsCog(commands.Cog, name="Records"):
                     await ctx.reply(embed=embed, mention_author=False)
                     return
 
-                async with self.utils.kamaitachi_client(target_id) as client:
-                    resp = await client.get("https://kamai.tachi.ac/api/v1/users/me")
-                    data = resp.json()
+                tachi_auth = await self.utils.kamaitachi_auth(target_id)
+                client = self.utils.kamaitachi_http_client
+                resp = await client.get(
+                    "https://kamai.tachi.ac/api/v1/users/me", headers=tachi_auth
+                )
+                data = resp.json()
 
-                    if not data["success"]:
-                        msg = f"Could not get user information from Kamaitachi: {data['success']}"
-                        raise commands.CommandError(msg)
+                if not data["success"]:
+                    msg = f"Could not get user information from Kamaitachi: {data['success']}"
+                    raise commands.CommandError(msg)
 
-                    username = data["body"]["username"]
+                username = data["body"]["username"]
 
-                    resp = await client.get(
-                        f"https://kamai.tachi.ac/api/v1/users/me/games/chunithm/Single/pbs?search={urllib.parse.quote(song.title)}"
-                    )
-                    data = resp.json()
+                resp = await client.get(
+                    f"https://kamai.tachi.ac/api/v1/users/me/games/chunithm/Single/pbs?search={urllib.parse.quote(song.title)}",
+                    headers=tachi_auth,
+                )
+                data = resp.json()
 
-                    if not data["success"]:
-                        msg = f"Could not get scores from Kamaitachi: {data['success']}"
-                        raise commands.CommandError(msg)
+                if not data["success"]:
+                    msg = f"Could not get scores from Kamaitachi: {data['success']}"
+                    raise commands.CommandError(msg)
 
-                    raw_records = convert_kt_pbs_to_records(data["body"])
+                raw_records = convert_kt_pbs_to_records(data["body"])
 
-                    if len(raw_records) == 0:
-                        await ctx.reply(
-                            f"No records found for {username} on **{escape_markdown(song.title)}** on Kamaitachi.",
-                            mention_author=False,
-                        )
-                        return
+                if len(raw_records) == 0:
+                    await ctx.reply(
+                        f"No records found for {username} on **{escape_markdown(song.title)}** on Kamaitachi.",
+                        mention_author=False,
+                    )
+                    return
 
-                    network = " on Kamaitachi"
-                    records = [
-                        pb for pb in raw_records if pb.extras[KEY_SONG_ID] == song.id
-                    ]
-                    records = await self.utils.hydrate_records(records)
-                    records.sort(key=lambda r: r.difficulty.value)
+                network = " on Kamaitachi"
+                records = [
+                    pb for pb in raw_records if pb.extras[KEY_SONG_ID] == song.id
+                ]
+                records = await self.utils.hydrate_records(records)
+                records.sort(key=lambda r: r.difficulty.value)
             else:
                 async with self.utils.chuninet(target_id) as client:
                     userinfo = await client.authenticate()
@@ -828,40 +951,44 @@ class RecordsCog(commands.Cog, name="Records"):
                 raise commands.BadArgument(msg)
 
             if kamaitachi:
-                async with self.utils.kamaitachi_client(target_id) as client:
-                    resp = await client.get("https://kamai.tachi.ac/api/v1/users/me")
-                    data = resp.json()
+                tachi_auth = await self.utils.kamaitachi_auth(target_id)
+                client = self.utils.kamaitachi_http_client
+                resp = await client.get(
+                    "https://kamai.tachi.ac/api/v1/users/me", headers=tachi_auth
+                )
+                data = resp.json()
 
-                    if not data["success"]:
-                        msg = f"Could not get user information from Kamaitachi: {data['success']}"
-                        raise commands.CommandError(msg)
+                if not data["success"]:
+                    msg = f"Could not get user information from Kamaitachi: {data['success']}"
+                    raise commands.CommandError(msg)
 
-                    username = data["body"]["username"]
+                username = data["body"]["username"]
 
-                    resp = await client.get(
-                        f"https://kamai.tachi.ac/api/v1/users/me/games/chunithm/Single/pbs?search={urllib.parse.quote(song.title)}"
-                    )
-                    data = resp.json()
+                resp = await client.get(
+                    f"https://kamai.tachi.ac/api/v1/users/me/games/chunithm/Single/pbs?search={urllib.parse.quote(song.title)}",
+                    headers=tachi_auth,
+                )
+                data = resp.json()
 
-                    if not data["success"]:
-                        msg = f"Could not get scores from Kamaitachi: {data['success']}"
-                        raise commands.CommandError(msg)
+                if not data["success"]:
+                    msg = f"Could not get scores from Kamaitachi: {data['success']}"
+                    raise commands.CommandError(msg)
 
-                    raw_records = convert_kt_pbs_to_records(data["body"])
+                raw_records = convert_kt_pbs_to_records(data["body"])
 
-                    if len(raw_records) == 0:
-                        await ctx.reply(
-                            f"No records found for {username} on **{escape_markdown(song.title)}** on Kamaitachi.",
-                            mention_author=False,
-                        )
-                        return None
+                if len(raw_records) == 0:
+                    await ctx.reply(
+                        f"No records found for {username} on **{escape_markdown(song.title)}** on Kamaitachi.",
+                        mention_author=False,
+                    )
+                    return None
 
-                    network = " on Kamaitachi"
-                    records = [
-                        pb for pb in raw_records if pb.extras[KEY_SONG_ID] == song.id
-                    ]
-                    records = await self.utils.hydrate_records(records)
-                    records.sort(key=lambda r: r.difficulty.value)
+                network = " on Kamaitachi"
+                records = [
+                    pb for pb in raw_records if pb.extras[KEY_SONG_ID] == song.id
+                ]
+                records = await self.utils.hydrate_records(records)
+                records.sort(key=lambda r: r.difficulty.value)
             else:
                 async with self.utils.chuninet(target_id) as client:
                     user_info = await client.authenticate()
@@ -973,15 +1100,20 @@ class RecordsCog(commands.Cog, name="Records"):
 
         async with ctx.typing():
             if kamaitachi:
-                async with self.utils.kamaitachi_client(target_id) as client:
-                    resp = await client.get("https://kamai.tachi.ac/api/v1/users/me")
-                    data = resp.json()
-                    player_name = data["body"]["username"]
+                tachi_auth = await self.utils.kamaitachi_auth(target_id)
+                client = self.utils.kamaitachi_http_client
+                user_resp, pbs_resp = await asyncio.gather(
+                    client.get(
+                        "https://kamai.tachi.ac/api/v1/users/me", headers=tachi_auth
+                    ),
+                    client.get(
+                        "https://kamai.tachi.ac/api/v1/users/me/games/chunithm/Single/pbs/best?alg=rating",
+                        headers=tachi_auth,
+                    ),
+                )
 
-                    resp = await client.get(
-                        "https://kamai.tachi.ac/api/v1/users/me/games/chunithm/Single/pbs/best?alg=rating"
-                    )
-                    data = resp.json()
+                player_name = user_resp.json()["body"]["username"]
+                data = pbs_resp.json()
 
                 if not data["success"]:
                     msg = f"Could not retrieve your best scores from Kamaitachi: {data['description']}"
@@ -994,13 +1126,24 @@ class RecordsCog(commands.Cog, name="Records"):
 
                 best30 = await self.utils.hydrate_records(best30)
             else:
+                # CHUNITHM-NET sessions are stateful (and may need to log in again on
+                # the first request), so these must not overlap.
                 async with self.utils.chuninet(target_id) as client:
                     player_data = await client.player_data()
-                    player_name = player_data.name
-                    current_rating = player_data.rating.current
-                    max_rating = player_data.rating.max
                     best30 = await client.best30()
-                    best30 = await self.utils.hydrate_records(best30)
+
+                player_name = player_data.name
+                current_rating = player_data.rating.current
+                max_rating = player_data.rating.max
+                best30 = await self.utils.hydrate_records(best30)
+
+            # both the image and the embeds summarize the ratings of the scores,
+            # which doesn't work without any.
+            if len(best30) == 0:
+                await ctx.reply(
+                    f"No best scores found for {player_name}.", mention_author=False
+                )
+                return
 
             if not image:
                 view = B30View(ctx, best30)
@@ -1012,6 +1155,17 @@ class RecordsCog(commands.Cog, name="Records"):
                 )
                 return
 
+            # decode jackets that aren't cached yet in parallel; Pillow releases the
+            # GIL while decoding and filtering, which the single render thread can't
+            # take advantage of. failures are left for render_b30 to handle.
+            await asyncio.gather(
+                *(
+                    asyncio.to_thread(_load_b30_jacket, song_id)
+                    for song_id in {record.extras[KEY_SONG_ID] for record in best30}
+                ),
+                return_exceptions=True,
+            )
+
             b30_image = await asyncio.to_thread(
                 render_b30,
                 player_name,
@@ -1095,6 +1249,11 @@ class RecordsCog(commands.Cog, name="Records"):
             ctx if user is None else user.id
         ) as client:
             recent10 = await client.recent10()
+
+            if len(recent10) == 0:
+                await ctx.reply("No recent scores found.", mention_author=False)
+                return
+
             recent10 = await self.utils.hydrate_records(recent10)
 
             view = B30View(ctx, recent10, show_reachable=False)
@@ -1219,7 +1378,7 @@ class RecordsCog(commands.Cog, name="Records"):
 
         await interaction.response.defer()
         
-        if (genre or rank) and not difficulty:
+        if (genre is not None or rank is not None) and difficulty is None:
             return await interaction.followup.send(
                 "Difficulty must be set if genre or rank is set."
             )
@@ -1230,54 +1389,17 @@ class RecordsCog(commands.Cog, name="Records"):
             records = await client.music_record_by_folder(
                 level=level, genre=genre, difficulty=difficulty, rank=rank
             )
-            assert records is not None
-
-            if len(records) == 0:
+            if not records:
                 return await interaction.followup.send("No scores found.")
 
             records = await self.utils.hydrate_records(records)
 
-            if sort == "rating":
-                records.sort(
-                    reverse=True,
-                    key=lambda x: (
-                        x.extras.get(KEY_PLAY_RATING),
-                        x.score,
-                        x.extras.get(KEY_OVERPOWER_BASE),
-                    ),
-                )
-            elif sort == "score":
-                records.sort(
-                    reverse=True,
-                    key=lambda x: (
-                        x.score,
-                        x.extras.get(KEY_PLAY_RATING),
-                        x.extras.get(KEY_OVERPOWER_BASE),
-                    ),
-                )
-            elif sort == "overpower":
-                records.sort(
-                    reverse=True,
-                    key=lambda x: (
-                        x.extras.get(KEY_OVERPOWER_BASE),
-                        x.extras.get(KEY_PLAY_RATING),
-                        x.score,
-                    ),
-                )
-            elif sort == "overpower %":
-                records.sort(
-                    reverse=True,
-                    key=lambda x: (
-                        x.extras[KEY_OVERPOWER_BASE] / x.extras[KEY_OVERPOWER_MAX],
-                        x.extras.get(KEY_OVERPOWER_BASE),
-                        x.extras.get(KEY_PLAY_RATING),
-                        x.score,
-                    ),
-                )
-            else:
+            if (sort_key := _SORT_KEYS.get(sort)) is None:
                 msg = f"Invalid sort type {sort}. Expected one of score, rating, overpower, overpower %."
                 raise commands.BadArgument(msg)
 
+            records.sort(key=sort_key, reverse=True)
+
             ctx = await Context.from_interaction(interaction)
             view = B30View(ctx, records, show_average=False, show_reachable=False)
             view.message = await ctx.reply(
@@ -1344,12 +1466,31 @@ class RecordsCog(commands.Cog, name="Records"):
             return genre
 
         def difficulty(arg: str) -> Difficulty:
-            if arg.upper().startswith("WORLD"):
-                return Difficulty.WORLDS_END
-            return Difficulty.from_short_form(arg.upper()[:3])
+            prefix = arg[:3]
+            result = _DIFFICULTIES_BY_PREFIX.get(prefix)
+
+            # mixed case, e.g. "Mas"
+            if result is None:
+                result = _DIFFICULTIES_BY_PREFIX.get(prefix.upper())
+
+            if result is None:
+                msg = "Invalid difficulty."
+                raise ValueError(msg)
+
+            return result
 
         def rank(arg: str) -> Rank:
-            return Rank[arg.upper().replace("+", "p")]
+            result = _RANKS_BY_NAME.get(arg)
+
+            # mixed case, e.g. "Sss+"
+            if result is None:
+                result = _RANKS_BY_NAME.get(arg.upper())
+
+            if result is None:
+                msg = "Invalid rank."
+                raise ValueError(msg)
+
+            return result
 
         def sort_type(arg: str) -> str:
             if arg not in {
@@ -1382,7 +1523,9 @@ class RecordsCog(commands.Cog, name="Records"):
         except ArgumentError as e:
             raise commands.BadArgument(str(e)) from e
 
-        if (args.genre or args.rank) and not args.difficulty:
+        if (
+            args.genre is not None or args.rank is not None
+        ) and args.difficulty is None:
             msg = "Must specify a difficulty when searching by genre or rank."
             raise commands.BadArgument(msg)
 
@@ -1390,11 +1533,12 @@ class RecordsCog(commands.Cog, name="Records"):
         str_level = None
 
         if len(rest) > 0:
-            for converter in [commands.MemberConverter, commands.UserConverter]:
-                with contextlib.suppress(commands.BadArgument):
-                    user = await converter().convert(ctx, rest[0])
-                    rest = rest[1:]
-                    break
+            # levels are never looked up as users
+            if _LEVEL.fullmatch(rest[0]) is None:
+                user = await self.utils.resolve_user(ctx, rest[0])
+
+            if user is not None:
+                rest = rest[1:]
 
         str_level = rest[0] if len(rest) > 0 else None
             
@@ -1415,24 +1559,27 @@ class RecordsCog(commands.Cog, name="Records"):
             # Three accepted use cases, "14", "14+" and "14.9"
             msg = "Invalid level."
 
-            if "." in str_level and str_level.replace(".", "", 1).isdigit():
+            if (match := _LEVEL.fullmatch(str_level)) is None:
+                raise commands.BadArgument(msg)
+
+            base_level, decimal_part, plus = match.groups()
+
+            if decimal_part is not None:
                 internal_level = float(str_level)
-                level = str(int(internal_level))
+                level = str(int(base_level))
 
                 if internal_level * 10 % 10 >= 5:
                     level += "+"
-            elif str_level[-1] == "+" and str_level[:-1].isdigit():
-                if int(str_level[:-1]) not in range(7, 15):
+            elif plus is not None:
+                if int(base_level) not in range(7, 15):
                     raise commands.BadArgument(msg)
 
                 level = str_level
-            elif str_level.isdigit():
-                if int(str_level) not in range(1, 16):
+            else:
+                if int(base_level) not in range(1, 16):
                     raise commands.BadArgument(msg)
 
                 level = str_level
-            else:
-                raise commands.BadArgument(msg)
 
         async with ctx.typing(), self.utils.chuninet(
             ctx if user is None else user.id
@@ -1443,54 +1590,12 @@ class RecordsCog(commands.Cog, name="Records"):
                 difficulty=args.difficulty,
                 rank=args.rank,
             )
-            assert records is not None
-
-            if len(records) == 0:
+            if not records:
                 return await ctx.reply("No scores found.", mention_author=False)
 
             records = await self.utils.hydrate_records(records)
 
-            if args.sort is None or args.sort == "rating":
-                records.sort(
-                    reverse=True,
-                    key=lambda x: (
-                        x.extras.get(KEY_PLAY_RATING),
-                        x.score,
-                        x.extras.get(KEY_OVERPOWER_BASE),
-                    ),
-                )
-            elif args.sort == "score":
-                records.sort(
-                    reverse=True,
-                    key=lambda x: (
-                        x.score,
-                        x.extras.get(KEY_PLAY_RATING),
-                        x.extras.get(KEY_OVERPOWER_BASE),
-                    ),
-                )
-            elif args.sort in {"overpower", "op"}:
-                records.sort(
-                    reverse=True,
-                    key=lambda x: (
-                        x.extras.get(KEY_OVERPOWER_BASE),
-                        x.extras.get(KEY_PLAY_RATING),
-                        x.score,
-                    ),
-                )
-            elif args.sort in {"overpower_percent", "op_percent"}:
-                records.sort(
-                    reverse=True,
-                    key=lambda x: (
-                        x.extras[KEY_OVERPOWER_BASE] / x.extras[KEY_OVERPOWER_MAX],
-                        x.extras.get(KEY_OVERPOWER_BASE),
-                        x.extras.get(KEY_PLAY_RATING),
-                        x.score,
-                    ),
-                )
-            else:
-                msg = f"Invalid sort type {args.sort}. Expected one of score, rating, op, op_percent, overpower, overpower_percent."
-                raise commands.BadArgument(msg)
-
+            # filter before sorting so that only the records shown are sorted
             if internal_level is not None:
                 records = [
                     r
@@ -1498,6 +1603,12 @@ class RecordsCog(commands.Cog, name="Records"):
                     if r.extras.get(KEY_INTERNAL_LEVEL) == internal_level
                 ]
 
+                if not records:
+                    return await ctx.reply("No scores found.", mention_author=False)
+
+            # sort_type has already validated the sort name
+            records.sort(key=_SORT_KEYS[args.sort or "rating"], reverse=True)
+
             view = B30View(ctx, records, show_average=False, show_reachable=False)
             view.message = await ctx.reply(
                 content=view.format_content(),
@@ -0,0 +1,18 @@
+from chunithm_net.models.type_paired_dict import TypePairedDict, TypePairedDictKey
+
+KEY_INT = TypePairedDictKey[int]()
+
+
+def test_get_returns_stored_value():
+    data = TypePairedDict()
+    data[KEY_INT] = 1
+
+    assert data.get(KEY_INT) == 1
+    assert data.get(KEY_INT, 2) == 1
+
+
+def test_get_returns_default_for_missing_key():
+    data = TypePairedDict()
+
+    assert data.get(KEY_INT) is None
+    assert data.get(KEY_INT, 2) == 2
@@ -115,6 +115,24 @@ from chunithm_net.utils import difficulty_from_imgurl, get_rank_and_lamps
             """,
             (Rank.SSSp, ClearType.CATASTROPHY, ComboType.NONE, ChainType.NONE),
         ),
+        (
+            """
+            <div class="play_musicdata_icon clearfix">
+                <!-- ◆クリア -->
+                <img src="https://chunithm-net-eng.com/mobile/images/icon_absolutep.png">
+                <!-- ◆ランク -->
+                <img src="https://chunithm-net-eng.com/mobile/images/icon_rank_13.png">
+                <img src="https://chunithm-net-eng.com/mobile/images/icon_alljusticecritical.png">
+                <img src="https://chunithm-net-eng.com/mobile/images/icon_fullchain2.png">
+            </div>
+            """,
+            (
+                Rank.SSSp,
+                ClearType.ABSOLUTE_PLUS,
+                ComboType.ALL_JUSTICE_CRITICAL,
+                ChainType.FULL_CHAIN,
+            ),
+        ),
     ],
 )
 def test_get_rank_and_cleartype(html, expected):
@@ -147,6 +147,14 @@ class DangerousConfig:
 class Config:
     def __init__(self, config: "ConfigParser") -> None:
         self.__config = config
+
+        # Missing sections fall back to their defaults, so importing modules
+        # that read the config does not fail before startup() can report
+        # what is missing.
+        for section in ("bot", "web", "credentials", "icons", "legal", "dangerous"):
+            if not self.__config.has_section(section):
+                self.__config.add_section(section)
+
         self.bot = BotConfig(self.__config["bot"])
         self.web = WebConfig(self.__config["web"])
         self.credentials = CredentialsConfig(self.__config["credentials"])
@@ -12,6 +12,8 @@ from chunithm_net.consts import (
 )
 from chunithm_net.models.enums import ClearType, ComboType, Difficulty, Rank
 from chunithm_net.models.record import (
+    _RECENT_RECORD_FIELDS,
+    _RECORD_FIELDS,
     DetailedRecentRecord,
     Judgements,
     NoteType,
@@ -164,8 +166,40 @@ class KTChunithmScoreResponseBody(msgspec.Struct):
     charts: list[KTChunithmChart]
 
 
+class KTUser(msgspec.Struct):
+    id: int
+    username: str
+
+
+class KTChunithmClasses(msgspec.Struct):
+    dan: str | None = None
+    emblem: str | None = None
+
+
+class KTChunithmRatings(msgspec.Struct, rename="camel"):
+    naive_rating: float
+
+
+class KTChunithmGameStats(msgspec.Struct):
+    classes: KTChunithmClasses
+    ratings: KTChunithmRatings
+
+
+class KTMostRecentScore(msgspec.Struct, rename="camel"):
+    time_achieved: int | None = None
+
+
+class KTChunithmUserGameStats(msgspec.Struct, rename="camel"):
+    game_stats: KTChunithmGameStats
+    total_scores: int
+    playtime: int
+    most_recent_score: KTMostRecentScore | None = None
+
+
 KTChunithmPersonalBestResponse = KTResponse[KTChunithmPersonalBestResponseBody]
 KTChunithmScoreResponse = KTResponse[KTChunithmScoreResponseBody]
+KTUserResponse = KTResponse[KTUser]
+KTChunithmUserGameStatsResponse = KTResponse[KTChunithmUserGameStats]
 
 
 def _convert_kt_to_record(
@@ -200,7 +234,7 @@ def _convert_kt_to_record(
             track=-1,
             date=datetime.fromtimestamp(score.time_achieved / 1000, tz=UTC),
             new_record=False,
-            **record.__dict__,
+            **{name: getattr(record, name) for name in _RECORD_FIELDS},
         )
 
     if (
@@ -221,7 +255,14 @@ def _convert_kt_to_record(
                 miss=judgements.miss,
             ),
             "note_type": NoteType(-1, -1, -1, -1, -1),
-            **record.__dict__,
+            **{
+                name: getattr(record, name)
+                for name in (
+                    _RECENT_RECORD_FIELDS
+                    if isinstance(record, RecentRecord)
+                    else _RECORD_FIELDS
+                )
+            },
         }
 
         if "track" not in kwargs:
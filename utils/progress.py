@@ -0,0 +1,61 @@
+import asyncio
+import contextlib
+from typing import Optional
+
+import discord
+
+from utils.logging import logger as root_logger
+
+logger = root_logger.getChild(__name__)
+
+
+class ProgressMessage(contextlib.AbstractAsyncContextManager):
+    """Coalesce progress updates to a message.
+
+    Setting `content` is free; a background task edits the message with the
+    latest content at most once every `interval` seconds while the context
+    manager is active. Intermediate updates are dropped. Failed edits are
+    logged and never interrupt the work being reported on.
+    """
+
+    def __init__(self, message: discord.Message, *, interval: float = 1.5) -> None:
+        self.message = message
+        self.interval = interval
+        self.content = message.content
+
+        self._shown = message.content
+        self._task: Optional[asyncio.Task] = None
+
+    async def _update(self):
+        while True:
+            if self.content != self._shown:
+                self._shown = self.content
+                try:
+                    await self.message.edit(
+                        content=self._shown,
+                        allowed_mentions=discord.AllowedMentions.none(),
+                    )
+                except discord.NotFound:
+                    # the message was deleted, there is nothing left to update
+                    return
+                except discord.HTTPException:
+                    logger.warning("Could not update progress message", exc_info=True)
+
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._update())
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception("Progress message updater failed")
@@ -96,6 +96,8 @@ async def kamaitachi_oauth(request: web.Request) -> web.Response:
             cookie.kamaitachi_token = token
             await db_session.merge(cookie)
 
+    bot.dispatch("profile_update", discord_id)
+
     return web.Response(
         text="Your accounts are now linked! You can close this page and use the bot now.",
         content_type="text/plain",